@@ -3,10 +3,14 @@ import os
 import sys
 import json
 from dataclasses import dataclass
-from github import Github
 from github.Issue import Issue
 from github.IssueComment import IssueComment
-from gha_issue_resolution.issue_processor import process_issue
+from gha_issue_resolution.ai_backends import warm_backend
+from gha_issue_resolution.file_utils import get_relevant_files, read_files
+from gha_issue_resolution.github_utils import create_github_client
+from gha_issue_resolution.issue_processor import TRIGGER_UPDATE_COMMENT, process_issue, get_bot_comments
+from gha_issue_resolution.resilience import call_with_retry
+from gha_issue_resolution.task_graph import TaskGraph
 
 @dataclass
 class EventComment:
@@ -32,8 +36,17 @@ def create_comment_from_payload(comment_data: dict) -> EventComment:
         user=comment_data.get('user', {})
     )
 
+def needs_file_contents(event_name: str, event_data: dict) -> bool:
+    """Check whether the event is likely to need a fresh analysis of the repository"""
+    if event_name == 'issues':
+        return True
+    body = (event_data.get('comment') or {}).get('body') or ''
+    return TRIGGER_UPDATE_COMMENT in body.lower()
+
 def main():
     """Main function"""
+    graph = TaskGraph()
+    event_data = None
     try:
         # Get environment variables
         token = os.environ['GITHUB_TOKEN']
@@ -44,13 +57,6 @@ def main():
         # Get event data
         event_data = get_event_data()
         
-        # Initialize GitHub client
-        gh = Github(token)
-        
-        # Get repository
-        repo_name = os.environ['GITHUB_REPOSITORY']
-        repo = gh.get_repo(repo_name)
-        
         # Get issue number based on event type
         if event_name == 'issues':
             issue_number = event_data['issue']['number']
@@ -62,18 +68,45 @@ def main():
             print(f"Unsupported event: {event_name}")
             sys.exit(1)
         
-        # Get issue
-        issue = repo.get_issue(number=int(issue_number))
+        # Initialize GitHub client
+        gh = create_github_client(token)
+        repo_name = os.environ['GITHUB_REPOSITORY']
+        
+        def get_issue(repo):
+            issue = call_with_retry(
+                f"Get issue #{issue_number}",
+                lambda: repo.get_issue(number=int(issue_number))
+            )
+            # If this is a comment event, attach the comment to the issue object
+            if event_name == 'issue_comment':
+                comment = create_comment_from_payload(event_data['comment'])
+                print(f"Comment body: {comment.body}")
+                setattr(issue, 'comment', comment)
+            return issue
         
-        # If this is a comment event, attach the comment to the issue object
-        if event_name == 'issue_comment':
-            comment_data = event_data['comment']
-            comment = create_comment_from_payload(comment_data)
-            print(f"Comment body: {comment.body}")
-            setattr(issue, 'comment', comment)
+        def run_process_issue(repo, issue, bot_comments, _model, get_file_contents=None):
+            process_issue(repo, issue, bot_comments=bot_comments, get_file_contents=get_file_contents)
         
-        # Process issue
-        process_issue(repo, issue)
+        # GitHub API calls, the repository scan and model warm-up are
+        # independent, so they run concurrently. The scan only runs for events
+        # that usually need an analysis, and processing waits for it only when
+        # it actually generates one.
+        graph.add('repo', lambda: call_with_retry("Get repository", lambda: gh.get_repo(repo_name)))
+        graph.add('issue', get_issue, deps=['repo'])
+        graph.add('bot_comments', get_bot_comments, deps=['issue'])
+        graph.add('model', warm_backend)
+        lazy_deps = []
+        if needs_file_contents(event_name, event_data):
+            graph.add('relevant_files', get_relevant_files)
+            graph.add('file_contents', read_files, deps=['relevant_files'])
+            lazy_deps.append('file_contents')
+        graph.add(
+            'process_issue',
+            run_process_issue,
+            deps=['repo', 'issue', 'bot_comments', 'model'],
+            lazy_deps=lazy_deps
+        )
+        graph.run()
         
     except Exception as e:
         print(f"Error: {str(e)}")
@@ -81,6 +114,8 @@ def main():
         import traceback
         print(traceback.format_exc())  # Print full stack trace
         sys.exit(1)
+    finally:
+        print(f"\n{graph.report()}")
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,282 @@
+"""Model backends and request routing for AI queries"""
+import os
+import hashlib
+import tempfile
+from typing import Dict, List, Optional, Tuple
+import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from google.generativeai.types import HarmCategory, HarmBlockThreshold
+from google.generativeai.types import GenerationConfig
+from gha_issue_resolution.resilience import (
+    call_with_retry, run_with_timeout, GEMINI_TIMEOUT, GEMINI_UPLOAD_TIMEOUT, GEMINI_CALL_DEADLINE,
+)
+
+# Model identifiers, overridable from the environment
+SMALL_MODEL_ID = os.environ.get('SMALL_MODEL_ID', 'gemini-1.5-flash-8b')
+MODEL_ID = os.environ.get('MODEL_ID', 'gemini-1.5-flash-002')
+LARGE_MODEL_ID = os.environ.get('LARGE_MODEL_ID', 'gemini-1.5-pro-002')
+MAX_TOKENS = int(os.environ.get('MAX_TOKENS', '8192'))
+
+# Prompts (issue text and instructions, without repository files) at or
+# below this estimated size go to the small model
+SMALL_PROMPT_TOKENS = int(os.environ.get('SMALL_PROMPT_TOKENS', '1500'))
+
+# Rough conversion used to estimate prompt size without calling the API
+CHARS_PER_TOKEN = 4
+
+# Input context window per model, in tokens
+MODEL_CONTEXT_LIMITS: Dict[str, int] = {
+    'gemini-1.5-flash-8b': 1_048_576,
+    'gemini-1.5-flash-002': 1_048_576,
+    'gemini-1.5-pro-002': 2_097_152,
+}
+DEFAULT_CONTEXT_LIMIT = 1_048_576
+
+# Set model parameters
+generation_config = GenerationConfig(
+    temperature=0.7,
+    top_p=1.0,
+    top_k=32,
+    candidate_count=1,
+    max_output_tokens=MAX_TOKENS,
+)
+
+# Set safety settings
+safety_settings = {
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+}
+
+class QuotaExceededError(Exception):
+    """Raised by a backend when the model's quota or rate limit is exhausted"""
+
+def create_temp_file(content: str, suffix: str = '.txt') -> str:
+    """Create a temporary file with given content"""
+    temp = tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False)
+    try:
+        temp.write(content)
+        temp.close()
+        return temp.name
+    except Exception as e:
+        print(f"Error creating temp file: {e}")
+        if os.path.exists(temp.name):
+            os.unlink(temp.name)
+        raise
+
+def cleanup_temp_file(filepath: str):
+    """Safely delete temporary file"""
+    try:
+        if os.path.exists(filepath):
+            os.unlink(filepath)
+    except Exception as e:
+        print(f"Warning: Failed to delete temporary file {filepath}: {e}")
+
+class ModelBackend:
+    """Interface for text generation backends"""
+    name = 'base'
+
+    def setup(self):
+        """Prepare the backend for requests"""
+
+    def warm(self, model_ids: List[str]):
+        """Create clients ahead of the first request"""
+        self.setup()
+
+    def generate(
+        self,
+        model_id: str,
+        content_parts: List[str],
+        file_contents: Optional[List[Tuple[str, str]]] = None
+    ) -> str:
+        """Generate a response from prompt parts and optional file contents"""
+        raise NotImplementedError
+
+class GeminiBackend(ModelBackend):
+    """Backend for the Google Gemini API using the File API for file contents"""
+    name = 'gemini'
+
+    def __init__(self):
+        self._configured = False
+        self._models: Dict[str, genai.GenerativeModel] = {}
+
+    def setup(self):
+        """Configure the API key once per process"""
+        if not self._configured:
+            api_key = os.environ.get('GEMINI_API_KEY')
+            if api_key:
+                genai.configure(api_key=api_key)
+            self._configured = True
+
+    def get_model(self, model_id: str) -> genai.GenerativeModel:
+        """Get a cached model client for the given model"""
+        self.setup()
+        if model_id not in self._models:
+            self._models[model_id] = genai.GenerativeModel(
+                model_id,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+            )
+        return self._models[model_id]
+
+    def warm(self, model_ids: List[str]):
+        """Create model clients locally, without API calls that runs may not need"""
+        for model_id in model_ids:
+            self.get_model(model_id)
+
+    def generate(
+        self,
+        model_id: str,
+        content_parts: List[str],
+        file_contents: Optional[List[Tuple[str, str]]] = None
+    ) -> str:
+        model = self.get_model(model_id)
+        temp_files = []
+        content_parts = list(content_parts)
+        try:
+            if file_contents:
+                for filepath, content in file_contents:
+                    if content:
+                        temp_path = create_temp_file(content)
+                        temp_files.append(temp_path)
+                        # upload_file takes no timeout, so bound each attempt here
+                        file_obj = call_with_retry(
+                            f"Upload {filepath}",
+                            lambda path=temp_path: run_with_timeout(
+                                f"Upload {filepath}",
+                                lambda: genai.upload_file(path),
+                                GEMINI_UPLOAD_TIMEOUT
+                            ),
+                            service='gemini'
+                        )
+                        content_parts.extend([
+                            f"\nFile: {filepath}",
+                            file_obj
+                        ])
+
+            response = call_with_retry(
+                f"Generate with {model_id}",
+                lambda: model.generate_content(
+                    content_parts,
+                    request_options={'timeout': GEMINI_TIMEOUT}
+                ),
+                service='gemini',
+                deadline=GEMINI_CALL_DEADLINE
+            )
+            print(f"\nUsage metadata:\n{response.prompt_feedback}")
+            print(f"\nFinish reason:\n{response.candidates[0].finish_reason}")
+            print(f"\nSafety ratings:\n{response.candidates[0].safety_ratings}")
+            return response.text
+        except google_exceptions.ResourceExhausted as e:
+            raise QuotaExceededError(f"{model_id}: {e}") from e
+        finally:
+            # Clean up temporary files
+            for temp_file in temp_files:
+                cleanup_temp_file(temp_file)
+
+class StubBackend(ModelBackend):
+    """Deterministic local backend for tests and dry runs"""
+    name = 'stub'
+
+    def generate(
+        self,
+        model_id: str,
+        content_parts: List[str],
+        file_contents: Optional[List[Tuple[str, str]]] = None
+    ) -> str:
+        digest = hashlib.sha256()
+        for part in content_parts:
+            digest.update(str(part).encode('utf-8'))
+        for filepath, content in file_contents or []:
+            digest.update(filepath.encode('utf-8'))
+            digest.update(content.encode('utf-8'))
+        files = len(file_contents or [])
+        return (
+            f"Stub response from {model_id} for {files} files "
+            f"(digest {digest.hexdigest()[:12]})"
+        )
+
+BACKENDS = {
+    GeminiBackend.name: GeminiBackend,
+    StubBackend.name: StubBackend,
+}
+
+_backend: Optional[ModelBackend] = None
+
+def get_backend() -> ModelBackend:
+    """Get the backend selected by the AI_BACKEND environment variable"""
+    global _backend
+    if _backend is None:
+        backend_name = os.environ.get('AI_BACKEND', GeminiBackend.name)
+        if backend_name not in BACKENDS:
+            raise ValueError(f"Unknown AI backend: {backend_name}")
+        _backend = BACKENDS[backend_name]()
+        print(f"Using AI backend: {backend_name}")
+    return _backend
+
+def warm_backend():
+    """Warm up the configured backend for the models requests are routed to"""
+    get_backend().warm([MODEL_ID, SMALL_MODEL_ID])
+
+def estimate_tokens(
+    content_parts: List[str],
+    file_contents: Optional[List[Tuple[str, str]]] = None
+) -> int:
+    """Estimate the number of input tokens in a request"""
+    chars = sum(len(str(part)) for part in content_parts)
+    for filepath, content in file_contents or []:
+        chars += len(filepath) + len(content or '')
+    return chars // CHARS_PER_TOKEN
+
+def fits_context(model_id: str, tokens: int) -> bool:
+    """Check that a request and its response fit the model's context window"""
+    limit = MODEL_CONTEXT_LIMITS.get(model_id, DEFAULT_CONTEXT_LIMIT)
+    return tokens + MAX_TOKENS <= limit
+
+def route_model(prompt_tokens: int, total_tokens: int, followup: bool = False) -> str:
+    """Pick a model from the prompt size, using the total size only to check context fit
+
+    Short prompts and follow-ups go to the small model, and the large model is
+    used only when the whole request does not fit the regular one.
+    """
+    if not fits_context(MODEL_ID, total_tokens):
+        return LARGE_MODEL_ID
+    if (followup or prompt_tokens <= SMALL_PROMPT_TOKENS) and fits_context(SMALL_MODEL_ID, total_tokens):
+        return SMALL_MODEL_ID
+    return MODEL_ID
+
+def get_fallback_chain(model_id: str, tokens: int) -> List[str]:
+    """Get the routed model followed by the alternatives that can hold the request"""
+    chain = [model_id]
+    for candidate in (MODEL_ID, LARGE_MODEL_ID, SMALL_MODEL_ID):
+        if candidate not in chain and fits_context(candidate, tokens):
+            chain.append(candidate)
+    return chain
+
+def generate(
+    content_parts: List[str],
+    file_contents: Optional[List[Tuple[str, str]]] = None,
+    followup: bool = False
+) -> str:
+    """Route a request to a model and fall back to alternatives on quota errors"""
+    backend = get_backend()
+    prompt_tokens = estimate_tokens(content_parts)
+    tokens = estimate_tokens(content_parts, file_contents)
+    model_id = route_model(prompt_tokens, tokens, followup)
+    print(f"\nEstimated prompt size: {prompt_tokens} tokens, request size: {tokens} tokens, "
+          f"routed to {model_id}")
+
+    last_error = None
+    for candidate in get_fallback_chain(model_id, tokens):
+        try:
+            return backend.generate(candidate, content_parts, file_contents)
+        except QuotaExceededError as e:
+            print(f"Quota exceeded for {candidate}, trying next model: {e}")
+            last_error = e
+    raise last_error
+
+__all__ = [
+    'ModelBackend', 'GeminiBackend', 'StubBackend', 'QuotaExceededError',
+    'get_backend', 'warm_backend', 'route_model', 'generate',
+]
@@ -1,106 +1,34 @@
-"""Module for Gemini AI model integration with file handling support"""
-import os
-import google.generativeai as genai
-from google.generativeai.types import HarmCategory, HarmBlockThreshold
-from google.generativeai.types import GenerationConfig
+"""Module for AI model integration with file handling support"""
 import traceback
 import re
 from pathlib import Path
-from typing import List, Tuple
-import tempfile
-from gha_issue_resolution.file_utils import get_file_content
-
-# Setup Gemini API constants
-MODEL_ID = 'gemini-1.5-flash-002'
-MAX_TOKENS = int(os.environ.get('MAX_TOKENS', '8192'))
-
-# Set model parameters
-generation_config = GenerationConfig(
-    temperature=0.7,
-    top_p=1.0,
-    top_k=32,
-    candidate_count=1,
-    max_output_tokens=MAX_TOKENS,
-)
-
-# Set safety settings
-safety_settings = {
-    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-}
+from typing import List, Optional, Tuple
+from gha_issue_resolution.ai_backends import generate, get_backend
+from gha_issue_resolution.file_utils import get_file_content, read_files
 
 def setup_ai():
-    """Initialize the Gemini API"""
-    genai.configure(api_key=os.environ['GEMINI_API_KEY'])
-
-def create_temp_file(content: str, suffix: str = '.txt') -> str:
-    """Create a temporary file with given content"""
-    temp = tempfile.NamedTemporaryFile(mode='w', suffix=suffix, delete=False)
-    try:
-        temp.write(content)
-        temp.close()
-        return temp.name
-    except Exception as e:
-        print(f"Error creating temp file: {e}")
-        if os.path.exists(temp.name):
-            os.unlink(temp.name)
-        raise
+    """Initialize the configured AI backend"""
+    get_backend().setup()
 
-def cleanup_temp_file(filepath: str):
-    """Safely delete temporary file"""
+def query_model(prompt, file_contents: List[Tuple[str, str]] = None, followup: bool = False):
+    """Query the configured model backend, routed by request size"""
     try:
-        if os.path.exists(filepath):
-            os.unlink(filepath)
-    except Exception as e:
-        print(f"Warning: Failed to delete temporary file {filepath}: {e}")
-
-def query_gemini(prompt, file_contents: List[Tuple[str, str]] = None):
-    """Query Gemini API using File API for large content"""
-    try:
-        model = genai.GenerativeModel(
-            MODEL_ID,
-            generation_config=generation_config,
-            safety_settings=safety_settings,
-        )
-
-        # If we have file contents, create temporary files and use File API
-        temp_files = []
         content_parts = []
-
         if isinstance(prompt, str):
             content_parts.append(prompt)
         else:
             content_parts.extend(prompt)
 
-        if file_contents:
-            for filepath, content in file_contents:
-                if content:
-                    temp_path = create_temp_file(content)
-                    temp_files.append(temp_path)
-                    file_obj = genai.upload_file(temp_path)
-                    content_parts.extend([
-                        f"\nFile: {filepath}",
-                        file_obj
-                    ])
-
-        try:
-            response = model.generate_content(content_parts)
-            print(f"\nUsage metadata:\n{response.prompt_feedback}")
-            print(f"\nFinish reason:\n{response.candidates[0].finish_reason}")
-            print(f"\nSafety ratings:\n{response.candidates[0].safety_ratings}")
-            return response.text
-        finally:
-            # Clean up temporary files
-            for temp_file in temp_files:
-                cleanup_temp_file(temp_file)
+        return generate(content_parts, file_contents, followup=followup)
 
     except Exception as e:
-        print(f"Error querying Gemini: {str(e)}")
+        print(f"Error querying model: {str(e)}")
         print(traceback.format_exc())
         raise
 
+# Kept for callers written against the Gemini-only API
+query_gemini = query_model
+
 def parse_code_blocks(solution_text):
     """Extract code blocks and their file paths from the solution text"""
     print("\nParsing code blocks from solution...")
@@ -131,17 +59,18 @@ def parse_code_blocks(solution_text):
     print(f"\nTotal code changes found: {len(code_changes)}")
     return code_changes
 
-def analyze_issue(issue, relevant_files: List[str]) -> str:
+def analyze_issue(
+    issue,
+    relevant_files: List[str],
+    followup: bool = False,
+    file_contents: Optional[List[Tuple[str, str]]] = None
+) -> str:
     """Analyze issue using File API for file contents"""
     print(f"\nAnalyzing issue with {len(relevant_files)} relevant files...")
     
-    # Prepare files and their contents
-    file_contents = []
-    for file_path in relevant_files:
-        if Path(file_path).is_file():
-            content = get_file_content(file_path)
-            if content and "Error reading file" not in content:
-                file_contents.append((file_path, content))
+    # Prepare files and their contents unless they were prefetched
+    if file_contents is None:
+        file_contents = read_files(relevant_files)
     
     if not file_contents:
         return "No relevant files found for analysis."
@@ -177,4 +106,4 @@ Please provide:
 5. Note any potential side effects or additional considerations
 """
     
-    return query_gemini(prompt, file_contents)
+    return query_model(prompt, file_contents, followup=followup)
@@ -0,0 +1,114 @@
+"""Local staging and validation of code changes before they are pushed"""
+import ast
+import json
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional, Tuple
+import yaml
+from gha_issue_resolution.file_utils import get_repo_root, get_file_content
+
+# The default GITHUB_TOKEN cannot write workflow files, so such changes
+# would fail halfway through pushing. Compared case-insensitively, since
+# checkouts on case-insensitive filesystems resolve both spellings the same.
+PROTECTED_PREFIXES = ('.github/workflows/',)
+
+class ChangesetValidationError(ValueError):
+    """Raised when staged changes fail local validation"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("Suggested changes failed validation:\n" + '\n'.join(f"- {e}" for e in errors))
+
+@dataclass
+class StagedChangeset:
+    """Validated changes held as an in-memory overlay of the checkout"""
+    repo_root: Path
+    changes: Dict[str, str] = field(default_factory=dict)
+
+    def items(self) -> List[Tuple[str, str]]:
+        return list(self.changes.items())
+
+def normalize_path(file_path: str, repo_root: Path) -> Tuple[str, Optional[str]]:
+    """Normalise a repository-relative path and check that it is safe to write"""
+    path = PurePosixPath(file_path.strip().replace('\\', '/'))
+    normalized = str(path)
+    if not normalized or normalized == '.':
+        return normalized, "empty path"
+    if path.is_absolute():
+        return normalized, f"{file_path}: absolute paths are not allowed"
+    if '..' in path.parts:
+        return normalized, f"{file_path}: path escapes the repository"
+    folded = normalized.casefold()
+    if '.git' in folded.split('/') or any(
+        f"{folded}/".startswith(prefix) for prefix in PROTECTED_PREFIXES
+    ):
+        return normalized, f"{file_path}: changes to this location are not allowed"
+
+    # Reject paths that leave the checkout through a symlink
+    root = repo_root.resolve()
+    try:
+        (root / normalized).resolve().relative_to(root)
+    except ValueError:
+        return normalized, f"{file_path}: path resolves outside the repository"
+    if (root / normalized).is_dir():
+        return normalized, f"{file_path}: path is a directory"
+    return normalized, None
+
+def check_syntax(file_path: str, content: str) -> Optional[str]:
+    """Parse Python, JSON and YAML files and return an error message if invalid"""
+    suffix = PurePosixPath(file_path).suffix.lower()
+    try:
+        if suffix == '.py':
+            ast.parse(content, filename=file_path)
+        elif suffix == '.json':
+            json.loads(content)
+        elif suffix in ('.yml', '.yaml'):
+            list(yaml.safe_load_all(content))
+    except SyntaxError as e:
+        return f"{file_path}: invalid Python syntax at line {e.lineno}: {e.msg}"
+    except ValueError as e:
+        return f"{file_path}: invalid JSON: {e}"
+    except yaml.YAMLError as e:
+        return f"{file_path}: invalid YAML: {e}"
+    return None
+
+def stage_changes(code_changes: List[Tuple[str, str]]) -> StagedChangeset:
+    """Apply changes to an in-memory overlay and validate all of them
+
+    Raises ChangesetValidationError listing every problem found, so nothing
+    is written to GitHub unless the whole changeset is valid.
+    """
+    repo_root = get_repo_root()
+    staged = StagedChangeset(repo_root)
+    errors = []
+
+    for file_path, content in code_changes:
+        normalized, error = normalize_path(file_path, repo_root)
+        if error:
+            errors.append(error)
+            continue
+        if not content.strip():
+            errors.append(f"{file_path}: new content is empty")
+            continue
+        if normalized in staged.changes:
+            print(f"Warning: Multiple changes for {normalized}, using the last one")
+        staged.changes[normalized] = content
+
+    for file_path, content in staged.items():
+        error = check_syntax(file_path, content)
+        if error:
+            errors.append(error)
+
+    if errors:
+        raise ChangesetValidationError(errors)
+
+    # Drop changes that leave the checkout as it is
+    for file_path, content in staged.items():
+        if (repo_root / file_path).is_file() and get_file_content(file_path).strip() == content.strip():
+            print(f"No changes to {file_path}, skipping")
+            del staged.changes[file_path]
+
+    print(f"Staged {len(staged.changes)} validated changes")
+    return staged
+
+__all__ = ['ChangesetValidationError', 'StagedChangeset', 'stage_changes']
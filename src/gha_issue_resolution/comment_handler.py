@@ -2,8 +2,10 @@
 from typing import List
 from github.Issue import Issue
 from github.IssueComment import IssueComment
-from gha_issue_resolution.ai_utils import query_gemini
-from gha_issue_resolution.file_utils import get_relevant_files, get_file_content
+from gha_issue_resolution.ai_utils import query_model
+from gha_issue_resolution.file_utils import get_relevant_files, read_files
+from gha_issue_resolution.github_utils import create_comment
+from gha_issue_resolution.resilience import call_with_retry
 
 RESPONSE_TEMPLATE = """## AI-generated response
 
@@ -14,7 +16,10 @@ To get an updated analysis, comment with: `/update`"""
 
 def get_conversation_history(issue: Issue) -> List[str]:
     """Get formatted conversation history from issue"""
-    comments = list(issue.get_comments())
+    comments = call_with_retry(
+        f"List comments on issue #{issue.number}",
+        lambda: list(issue.get_comments())
+    )
     conversation = []
     
     for comment in comments:
@@ -33,12 +38,7 @@ def create_response_comment(issue: Issue, trigger_comment: IssueComment) -> Issu
     conversation = get_conversation_history(issue)
     
     # Get relevant files
-    relevant_files = get_relevant_files()
-    file_contents = []
-    for file_path in relevant_files:
-        content = get_file_content(file_path)
-        if content and "Error reading file" not in content:
-            file_contents.append((file_path, content))
+    file_contents = read_files(get_relevant_files())
     
     # Create prompt with conversation context
     prompt = f"""Analyze this GitHub issue comment and provide an appropriate response:
@@ -70,12 +70,12 @@ Please provide:
    ```
 """
     
-    response = query_gemini(prompt, file_contents)
+    response = query_model(prompt, file_contents, followup=True)
     
     # Format comment using template
     comment_body = RESPONSE_TEMPLATE.format(response=response)
     
-    comment = issue.create_comment(comment_body)
+    comment = create_comment(issue, comment_body)
     print(f"\nAdded response comment: {comment.html_url}")
     return comment
 
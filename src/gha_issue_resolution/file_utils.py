@@ -2,7 +2,10 @@
 from pathlib import Path
 import os
 import traceback
-from typing import List
+from typing import List, Tuple
+from gha_issue_resolution.scan_cache import get_scan_cache
+
+DEFAULT_MAX_CHARS = 100000
 
 def get_repo_root() -> Path:
     """Get the root directory of the target repository"""
@@ -35,11 +38,18 @@ def get_repo_structure() -> str:
         print(traceback.format_exc())
         return "Error getting repository structure"
 
-def get_file_content(file_path: str, max_chars: int = 100000) -> str:
+def get_file_content(file_path: str, max_chars: int = DEFAULT_MAX_CHARS) -> str:
     """Get the content of a file with optional size limit"""
     repo_root = get_repo_root()
     full_path = repo_root / file_path
     
+    # Text extracted with the default limit is cached per commit
+    cache = get_scan_cache(repo_root) if max_chars == DEFAULT_MAX_CHARS else None
+    if cache:
+        content = cache.get_text(str(file_path))
+        if content is not None:
+            return content
+    
     try:
         print(f"Reading file: {full_path}")
         with open(full_path, 'r', encoding='utf-8') as file:
@@ -47,6 +57,8 @@ def get_file_content(file_path: str, max_chars: int = 100000) -> str:
             if len(content) == max_chars:
                 content += "\n... (file truncated due to size)"
             print(f"Successfully read {len(content)} characters")
+            if cache:
+                cache.set_text(str(file_path), content)
             return content
     except UnicodeDecodeError:
         print(f"Warning: Could not read {file_path} as text, skipping")
@@ -69,6 +81,13 @@ def get_relevant_files() -> List[str]:
     repo_root = get_repo_root()
     files = []
     
+    # Skip the walk entirely when the manifest matches this commit
+    cache = get_scan_cache(repo_root)
+    if cache and cache.exact:
+        files = cache.paths()
+        print(f"\nUsing cached scan of {repo_root}: {len(files)} relevant files")
+        return files
+    
     print(f"\nScanning for relevant files in: {repo_root}")
     try:
         for file in sorted(repo_root.rglob('*')):
@@ -80,6 +99,25 @@ def get_relevant_files() -> List[str]:
     except Exception as e:
         print(f"Error scanning repository: {str(e)}")
         print(traceback.format_exc())
+        return files
     
     print(f"\nFound {len(files)} relevant files")
+    if cache:
+        cache.refresh(files)
+        cache.save()
     return files
+
+def read_files(file_paths: List[str]) -> List[Tuple[str, str]]:
+    """Read the given repository files, skipping missing and unreadable ones"""
+    repo_root = get_repo_root()
+    file_contents = []
+    for file_path in file_paths:
+        if (repo_root / file_path).is_file():
+            content = get_file_content(file_path)
+            if content and "Error reading file" not in content:
+                file_contents.append((file_path, content))
+    
+    cache = get_scan_cache(repo_root)
+    if cache:
+        cache.save()
+    return file_contents
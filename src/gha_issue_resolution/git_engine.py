@@ -0,0 +1,157 @@
+"""Git operations engine for creating branches, commits and pull requests"""
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from github.GitCommit import GitCommit
+from github.InputGitTreeElement import InputGitTreeElement
+from github.PullRequest import PullRequest
+from github.Repository import Repository
+from gha_issue_resolution.file_utils import get_repo_root
+from gha_issue_resolution.github_utils import find_pull_request, get_existing_ref
+from gha_issue_resolution.resilience import call_with_retry
+
+BRANCH_PREFIX = 'ai-suggestion'
+
+class GitEngine:
+    """Git operations on one repository, caching the default branch, refs and commits for the run
+
+    Changes are committed with the Git data API as a single tree and commit,
+    and the branch is only created once that commit exists, so a failed run
+    never leaves a half-applied branch behind.
+    """
+
+    def __init__(self, repo: Repository):
+        self.repo = repo
+        self._default_branch: Optional[str] = None
+        self._head_shas: Dict[str, str] = {}
+        self._commits: Dict[str, GitCommit] = {}
+
+    @property
+    def default_branch(self) -> str:
+        if self._default_branch is None:
+            self._default_branch = self.repo.default_branch
+            print(f"Default branch: {self._default_branch}")
+        return self._default_branch
+
+    def get_head_sha(self, branch: Optional[str] = None) -> str:
+        """Get the commit SHA a branch points to"""
+        branch = branch or self.default_branch
+        if branch not in self._head_shas:
+            ref = call_with_retry(
+                f"Get ref {branch}",
+                lambda: self.repo.get_git_ref(f"heads/{branch}")
+            )
+            self._head_shas[branch] = ref.object.sha
+        return self._head_shas[branch]
+
+    def get_commit(self, sha: str) -> GitCommit:
+        if sha not in self._commits:
+            self._commits[sha] = call_with_retry(
+                f"Get commit {sha[:7]}",
+                lambda: self.repo.get_git_commit(sha)
+            )
+        return self._commits[sha]
+
+    def new_branch_name(self) -> str:
+        timestamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+        return f"{BRANCH_PREFIX}-{timestamp}-{os.urandom(2).hex()}"
+
+    def create_branch(self, branch: Optional[str] = None, sha: Optional[str] = None) -> str:
+        """Create a branch at the given commit, defaulting to the default branch head"""
+        branch = branch or self.new_branch_name()
+        sha = sha or self.get_head_sha()
+        call_with_retry(
+            f"Create branch {branch}",
+            lambda: self.repo.create_git_ref(f"refs/heads/{branch}", sha),
+            idempotency_check=lambda: get_existing_ref(self.repo, f"heads/{branch}")
+        )
+        self._head_shas[branch] = sha
+        print(f"Created branch: {branch} at {sha[:7]}")
+        return branch
+
+    def delete_branch(self, branch: str) -> None:
+        """Delete a branch, logging rather than raising on failure"""
+        try:
+            ref = get_existing_ref(self.repo, f"heads/{branch}")
+            if ref is not None:
+                ref.delete()
+                print(f"Deleted branch: {branch}")
+            self._head_shas.pop(branch, None)
+        except Exception as e:
+            print(f"Warning: Failed to delete branch {branch}: {e}")
+
+    def commit_changes(
+        self,
+        changes: List[Tuple[str, str]],
+        message: str,
+        parent_sha: Optional[str] = None
+    ) -> str:
+        """Create one commit with all changes on top of parent_sha and return its SHA"""
+        parent = self.get_commit(parent_sha or self.get_head_sha())
+        repo_root = get_repo_root()
+        elements = []
+        for file_path, content in changes:
+            local_path = repo_root / file_path
+            executable = local_path.is_file() and os.access(local_path, os.X_OK)
+            elements.append(InputGitTreeElement(
+                file_path,
+                '100755' if executable else '100644',
+                'blob',
+                content=content
+            ))
+
+        # Retrying a tree yields the same content-addressed tree. A retried commit
+        # gets a new timestamp and SHA, leaving the lost one dangling, which is
+        # harmless because nothing references it until create_branch()
+        tree = call_with_retry(
+            f"Create tree with {len(elements)} files",
+            lambda: self.repo.create_git_tree(elements, base_tree=parent.tree)
+        )
+        commit = call_with_retry(
+            "Create commit",
+            lambda: self.repo.create_git_commit(message, tree, [parent])
+        )
+        self._commits[commit.sha] = commit
+        print(f"Created commit {commit.sha[:7]} with {len(elements)} files")
+        return commit.sha
+
+    def open_pull_request(self, branch: str, title: str, body: str) -> PullRequest:
+        """Open a pull request from branch into the default branch"""
+        return call_with_retry(
+            f"Create pull request from {branch}",
+            lambda: self.repo.create_pull(
+                title=title,
+                body=body,
+                base=self.default_branch,
+                head=branch
+            ),
+            idempotency_check=lambda: find_pull_request(self.repo, branch)
+        )
+
+    def publish_changes(
+        self,
+        changes: List[Tuple[str, str]],
+        commit_message: str,
+        title: str,
+        body: str
+    ) -> PullRequest:
+        """Commit all changes, create a branch at that commit and open a pull request"""
+        commit_sha = self.commit_changes(changes, commit_message)
+        branch = self.create_branch(sha=commit_sha)
+        try:
+            pr = self.open_pull_request(branch, title, body)
+        except Exception:
+            self.delete_branch(branch)
+            raise
+        print(f"Created pull request: {pr.html_url}")
+        return pr
+
+_engines: Dict[str, GitEngine] = {}
+
+def get_git_engine(repo: Repository) -> GitEngine:
+    """Get the shared engine for a repository"""
+    if repo.full_name not in _engines:
+        _engines[repo.full_name] = GitEngine(repo)
+    return _engines[repo.full_name]
+
+__all__ = ['GitEngine', 'get_git_engine']
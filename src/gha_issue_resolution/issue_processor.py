@@ -1,11 +1,14 @@
 """Module for processing GitHub issues and their comments"""
-from typing import Optional, List
+from typing import Callable, Optional, List, Tuple
 from github.Repository import Repository
 from github.Issue import Issue
 from github.IssueComment import IssueComment
 from gha_issue_resolution.ai_utils import analyze_issue
 from gha_issue_resolution.file_utils import get_relevant_files
+from gha_issue_resolution.github_utils import create_comment
 from gha_issue_resolution.pr_handler import create_pr_from_analysis
+from gha_issue_resolution.resilience import call_with_retry
+from gha_issue_resolution.similarity_index import find_duplicate_analysis, record_analysis
 
 # Command triggers
 TRIGGER_PR_COMMENT = "/create-pr"
@@ -23,24 +26,80 @@ To get an updated analysis, comment with: `{update_trigger}`
 
 This is an AI-generated response and requires human validation and testing before implementation."""
 
+DUPLICATE_TEMPLATE = """This issue looks like a near-duplicate of #{number} ({similarity:.0%} similar), \
+which was analyzed on the same commit: {url}
+
+The analysis from that issue is repeated below. Comment with `{update_trigger}` \
+to get a fresh analysis for this issue instead.
+
+{analysis}"""
+
+def get_issue_text(issue: Issue) -> str:
+    """Get the text used to compare issues"""
+    return f"{issue.title}\n{issue.body or ''}"
+
 def get_bot_comments(issue: Issue) -> List[IssueComment]:
     """Get all AI-generated comments on the issue"""
     bot_comments = []
-    for comment in issue.get_comments():
+    comments = call_with_retry(
+        f"List comments on issue #{issue.number}",
+        lambda: list(issue.get_comments())
+    )
+    for comment in comments:
         if "AI-generated suggestion" in comment.body or "AI-generated response" in comment.body:
             bot_comments.append(comment)
     return bot_comments
 
-def create_analysis_comment(issue: Issue) -> IssueComment:
-    """Generate and post initial analysis comment"""
+def create_analysis_comment(
+    issue: Issue,
+    followup: bool = False,
+    get_file_contents: Optional[Callable[[], List[Tuple[str, str]]]] = None
+) -> IssueComment:
+    """Generate and post an analysis comment, routing follow-ups to a faster model
+
+    get_file_contents returns prefetched repository files and is only called
+    when a new analysis is generated.
+    """
     print("\nGenerating initial analysis...")
+    issue_text = get_issue_text(issue)
+    
+    # Reuse the analysis of a near-duplicate issue on the same commit,
+    # unless a fresh analysis was explicitly requested
+    if not followup:
+        duplicate = find_duplicate_analysis(issue.number, issue_text)
+        if duplicate:
+            print(f"\nIssue is a near-duplicate of #{duplicate.number} "
+                  f"({duplicate.similarity:.0%} similar), reusing its analysis")
+            comment_body = ANALYSIS_TEMPLATE.format(
+                analysis=DUPLICATE_TEMPLATE.format(
+                    number=duplicate.number,
+                    similarity=duplicate.similarity,
+                    url=duplicate.url,
+                    update_trigger=TRIGGER_UPDATE_COMMENT,
+                    analysis=duplicate.analysis
+                ),
+                pr_trigger=TRIGGER_PR_COMMENT,
+                update_trigger=TRIGGER_UPDATE_COMMENT
+            )
+            comment = create_comment(issue, comment_body)
+            print(f"\nAdded analysis comment: {comment.html_url}")
+            return comment
     
-    # Get relevant files
-    relevant_files = get_relevant_files()
+    # Get relevant files unless they were prefetched
+    file_contents = get_file_contents() if get_file_contents else None
+    if file_contents is None:
+        relevant_files = get_relevant_files()
+    else:
+        relevant_files = [file_path for file_path, _ in file_contents]
     print(f"\nAnalyzing {len(relevant_files)} relevant files...")
     
     # Get analysis
-    analysis_text = analyze_issue(issue, relevant_files)
+    analysis_text = analyze_issue(
+        issue,
+        relevant_files,
+        followup=followup,
+        file_contents=file_contents
+    )
     
     # Format comment using template
     comment_body = ANALYSIS_TEMPLATE.format(
@@ -49,8 +108,9 @@ def create_analysis_comment(issue: Issue) -> IssueComment:
         update_trigger=TRIGGER_UPDATE_COMMENT
     )
     
-    comment = issue.create_comment(comment_body)
+    comment = create_comment(issue, comment_body)
     print(f"\nAdded analysis comment: {comment.html_url}")
+    record_analysis(issue.number, comment.html_url, issue_text, analysis_text)
     return comment
 
 def check_triggers(comment: IssueComment) -> tuple[bool, bool]:
@@ -68,13 +128,24 @@ def check_triggers(comment: IssueComment) -> tuple[bool, bool]:
     
     return create_pr, update_analysis
 
-def process_issue(repo: Repository, issue: Issue) -> None:
-    """Process a GitHub issue and its comments"""
+def process_issue(
+    repo: Repository,
+    issue: Issue,
+    bot_comments: Optional[List[IssueComment]] = None,
+    get_file_contents: Optional[Callable[[], List[Tuple[str, str]]]] = None
+) -> None:
+    """Process a GitHub issue and its comments
+
+    bot_comments may be prefetched by the caller and get_file_contents may
+    return files read in the background; both are loaded here when not
+    provided. File contents are only requested when an analysis is generated.
+    """
     print(f"\nProcessing issue #{issue.number}: {issue.title}")
     print(f"Issue body: {issue.body}")
     
     # Get any existing bot comments
-    bot_comments = get_bot_comments(issue)
+    if bot_comments is None:
+        bot_comments = get_bot_comments(issue)
     
     # Get the latest comment that triggered this run
     trigger_comment: Optional[IssueComment] = None
@@ -85,7 +156,7 @@ def process_issue(repo: Repository, issue: Issue) -> None:
     # Check if this is a new issue or needs initial analysis
     if not bot_comments:
         print("\nNo existing analysis found, creating initial analysis...")
-        create_analysis_comment(issue)
+        create_analysis_comment(issue, get_file_contents=get_file_contents)
         return
     
     # If triggered by a comment, check for triggers
@@ -98,9 +169,9 @@ def process_issue(repo: Repository, issue: Issue) -> None:
             create_pr_from_analysis(repo, issue, latest_analysis)
         elif update_analysis:
             print("\nUpdated analysis triggered...")
-            create_analysis_comment(issue)
+            create_analysis_comment(issue, followup=True, get_file_contents=get_file_contents)
         else:
             print("\nNo action needed for this comment")
 
 # Exports
-__all__ = ['process_issue']
\ No newline at end of file
+__all__ = ['process_issue', 'get_bot_comments']
\ No newline at end of file
@@ -4,69 +4,13 @@ from github.Repository import Repository
 from github.Issue import Issue
 from github.IssueComment import IssueComment
 from github.PullRequest import PullRequest
-import os
-from datetime import datetime, timezone
 import traceback
 from pathlib import Path
 from gha_issue_resolution.ai_utils import parse_code_blocks
+from gha_issue_resolution.changeset import ChangesetValidationError, stage_changes
 from gha_issue_resolution.file_utils import get_file_content
-
-def create_branch(repo: Repository, base_branch: str = 'main') -> str:
-    """Create a new branch for the changes"""
-    try:
-        # Try 'main' first, then 'master' if 'main' fails
-        try:
-            base_ref = repo.get_git_ref(f"heads/{base_branch}")
-        except:
-            base_branch = 'master'
-            base_ref = repo.get_git_ref(f"heads/{base_branch}")
-            
-        timestamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
-        branch_name = f"ai-suggestion-{timestamp}-{os.urandom(2).hex()}"
-        repo.create_git_ref(f"refs/heads/{branch_name}", base_ref.object.sha)
-        print(f"Created branch: {branch_name} from {base_branch}")
-        return branch_name
-    except Exception as e:
-        print(f"Error creating branch: {str(e)}")
-        print(traceback.format_exc())
-        raise
-
-def update_file(
-    repo: Repository, 
-    file_path: str, 
-    content: str, 
-    branch: str, 
-    commit_message: str
-) -> None:
-    """Update or create a file in the repository"""
-    try:
-        print(f"Updating file: {file_path} on branch: {branch}")
-        print(f"Content length: {len(content)}")
-        
-        # Try to get existing file
-        try:
-            file = repo.get_contents(file_path, ref=branch)
-            repo.update_file(
-                file_path,
-                commit_message,
-                content,
-                file.sha,
-                branch=branch
-            )
-            print(f"Updated existing file: {file_path}")
-        except Exception as e:
-            print(f"File {file_path} doesn't exist, creating new file")
-            repo.create_file(
-                file_path,
-                commit_message,
-                content,
-                branch=branch
-            )
-            print(f"Created new file: {file_path}")
-    except Exception as e:
-        print(f"Error updating file {file_path}: {str(e)}")
-        print(traceback.format_exc())
-        raise
+from gha_issue_resolution.git_engine import get_git_engine
+from gha_issue_resolution.github_utils import create_comment
 
 def create_pr_from_analysis(
     repo: Repository, 
@@ -89,36 +33,41 @@ def create_pr_from_analysis(
         
         print(f"Number of code changes to apply: {len(code_changes)}")
         
-        # Create a new branch
-        branch_name = create_branch(repo)
-        
-        # Apply each code change
-        for file_path, new_content in code_changes:
-            print(f"\nProcessing changes for file: {file_path}")
-            update_file(
-                repo,
-                file_path,
-                new_content,
-                branch_name,
-                f"AI suggestion: Update {file_path}"
+        # Validate the whole changeset locally before writing anything
+        try:
+            staged = stage_changes(code_changes)
+        except ChangesetValidationError as e:
+            print(str(e))
+            problems = '\n'.join(f"- {error}" for error in e.errors)
+            create_comment(issue, f"""I didn't create a pull request because the suggested changes failed validation:
+
+{problems}
+
+Comment with `/update` to get a fresh analysis, then `/create-pr` to try again.""")
+            return None
+        if not staged.changes:
+            print("Suggested changes match the current repository content")
+            create_comment(
+                issue,
+                "I didn't create a pull request because the suggested changes already match the repository."
             )
+            return None
         
-        # Create pull request
-        pr = repo.create_pull(
+        # Commit all changes at once, then create the branch and pull request
+        changed_files = ', '.join(file_path for file_path, _ in staged.items())
+        pr = get_git_engine(repo).publish_changes(
+            staged.items(),
+            f"AI suggestion: Update {changed_files}",
             title=f"AI suggestion for issue #{issue.number}",
             body=f"""This pull request addresses issue #{issue.number}
 
 {analysis.body if hasattr(analysis, 'body') else analysis}
 
-This is an AI-generated pull request. Please review the changes carefully before merging.""",
-            base=repo.default_branch,
-            head=branch_name
+This is an AI-generated pull request. Please review the changes carefully before merging."""
         )
         
-        print(f"Created pull request: {pr.html_url}")
-        
         # Link PR to issue
-        comment = issue.create_comment(f"I've created a pull request with suggested changes: {pr.html_url}")
+        comment = create_comment(issue, f"I've created a pull request with suggested changes: {pr.html_url}")
         print(f"Added comment to issue: {comment.html_url}")
         
         return pr
@@ -130,7 +79,7 @@ This is an AI-generated pull request. Please review the changes carefully before
 {str(e)}
 ```
 Please check the repository permissions and settings."""
-        issue.create_comment(error_comment)
+        create_comment(issue, error_comment)
         raise
 
 # Make sure create_pr_from_analysis is available for import
@@ -0,0 +1,202 @@
+"""Retries, deadlines and circuit breakers for external API calls"""
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional, TypeVar
+import requests
+from github.GithubException import GithubException
+from google.api_core import exceptions as google_exceptions
+
+T = TypeVar('T')
+
+# Per-request socket timeouts, in seconds
+# PyGithub requires an integer timeout, so values like "30.0" are truncated
+GITHUB_TIMEOUT = int(float(os.environ.get('GITHUB_TIMEOUT', '30')))
+GEMINI_TIMEOUT = float(os.environ.get('GEMINI_TIMEOUT', '300'))
+GEMINI_UPLOAD_TIMEOUT = float(os.environ.get('GEMINI_UPLOAD_TIMEOUT', '60'))
+
+# Retry policy. Deadlines bound when a retry may start, so they must leave
+# room for more than one attempt of the per-request timeouts above.
+MAX_RETRIES = int(os.environ.get('MAX_RETRIES', '4'))
+CALL_DEADLINE = float(os.environ.get('CALL_DEADLINE', '120'))
+GEMINI_CALL_DEADLINE = float(os.environ.get('GEMINI_CALL_DEADLINE', '900'))
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 30.0
+
+# Circuit breaker policy
+BREAKER_THRESHOLD = int(os.environ.get('BREAKER_THRESHOLD', '5'))
+BREAKER_COOLDOWN = float(os.environ.get('BREAKER_COOLDOWN', '60'))
+
+TRANSIENT_STATUSES = {408, 429, 500, 502, 503, 504}
+
+TRANSIENT_GOOGLE_ERRORS = (
+    google_exceptions.InternalServerError,
+    google_exceptions.BadGateway,
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.GatewayTimeout,
+    google_exceptions.DeadlineExceeded,
+)
+
+class CircuitOpenError(Exception):
+    """Raised when calls to a service are short-circuited after repeated failures"""
+
+class CallTimeoutError(TimeoutError):
+    """Raised when a call without its own timeout runs for too long"""
+
+class CircuitBreaker:
+    """Stops calling a service after consecutive transient failures"""
+
+    def __init__(self, service: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.service = service
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    def before_call(self):
+        """Raise if the circuit is open; allow a trial call once the cooldown passes"""
+        if self.opened_at is None:
+            return
+        if time.monotonic() - self.opened_at < self.cooldown:
+            raise CircuitOpenError(
+                f"Circuit open for {self.service} after {self.failures} consecutive failures"
+            )
+        print(f"Circuit half-open for {self.service}, allowing a trial call")
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self.opened_at is None:
+                print(f"Opening circuit for {self.service} after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(service: str) -> CircuitBreaker:
+    """Get the shared circuit breaker for a service"""
+    if service not in _breakers:
+        _breakers[service] = CircuitBreaker(service)
+    return _breakers[service]
+
+def run_with_timeout(operation: str, func: Callable[[], T], timeout: float) -> T:
+    """Run func on a daemon thread and stop waiting for it after timeout seconds
+
+    For client calls that accept no timeout. The abandoned call keeps running
+    in the background, but a daemon thread cannot keep the process alive.
+    """
+    outcome: Dict[str, Any] = {}
+    finished = threading.Event()
+
+    def target():
+        try:
+            outcome['result'] = func()
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            finished.set()
+
+    threading.Thread(target=target, name=operation, daemon=True).start()
+    if not finished.wait(timeout):
+        raise CallTimeoutError(f"{operation} timed out after {timeout:.0f}s")
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['result']
+
+def is_secondary_rate_limit(error: GithubException) -> bool:
+    """Check for GitHub's secondary rate limit, which is reported as a 403"""
+    message = str(error.data).lower() if error.data else ''
+    return error.status == 403 and 'rate limit' in message
+
+def is_transient(error: Exception) -> bool:
+    """Check whether an error is worth retrying"""
+    if isinstance(error, GithubException):
+        return error.status in TRANSIENT_STATUSES or is_secondary_rate_limit(error)
+    if isinstance(error, (TRANSIENT_GOOGLE_ERRORS, CallTimeoutError)):
+        return True
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Get the server-requested delay from Retry-After or rate limit reset headers"""
+    headers = getattr(error, 'headers', None) or {}
+    headers = {key.lower(): value for key, value in headers.items()}
+
+    retry_after = headers.get('retry-after')
+    if retry_after:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    if headers.get('x-ratelimit-remaining') == '0' and headers.get('x-ratelimit-reset'):
+        try:
+            return max(0.0, float(headers['x-ratelimit-reset']) - time.time())
+        except ValueError:
+            pass
+    return None
+
+def get_backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+def call_with_retry(
+    operation: str,
+    func: Callable[[], T],
+    service: str = 'github',
+    idempotency_check: Optional[Callable[[], Any]] = None,
+    deadline: float = CALL_DEADLINE,
+    retries: int = MAX_RETRIES,
+) -> T:
+    """Call func, retrying transient errors with backoff until retries or deadline run out
+
+    Non-idempotent calls should pass an idempotency_check that returns the result
+    of an earlier attempt that reached the server, or None. It runs before every
+    retry so a write whose response was lost is not repeated.
+    """
+    breaker = get_breaker(service)
+    start = time.monotonic()
+    attempt = 0
+
+    while True:
+        breaker.before_call()
+        try:
+            # The check is an API call too, so its errors are retried like the call's
+            if attempt > 0 and idempotency_check is not None:
+                existing = idempotency_check()
+                if existing is not None:
+                    print(f"{operation}: earlier attempt succeeded, not repeating it")
+                    breaker.record_success()
+                    return existing
+
+            result = func()
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            breaker.record_failure()
+            attempt += 1
+            retry_after = get_retry_after(e)
+            delay = retry_after if retry_after is not None else get_backoff(attempt)
+            elapsed = time.monotonic() - start
+            if attempt > retries or elapsed + delay > deadline:
+                print(f"{operation}: giving up after {attempt} attempts in {elapsed:.1f}s")
+                raise
+            print(f"{operation}: transient error ({e}), retry {attempt}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
+
+__all__ = [
+    'CallTimeoutError', 'CircuitBreaker', 'CircuitOpenError', 'call_with_retry',
+    'get_breaker', 'run_with_timeout', 'GITHUB_TIMEOUT', 'GEMINI_TIMEOUT',
+    'GEMINI_UPLOAD_TIMEOUT', 'GEMINI_CALL_DEADLINE',
+]
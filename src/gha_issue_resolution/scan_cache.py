@@ -0,0 +1,205 @@
+"""Persisted manifest of repository files and their extracted text, keyed by commit"""
+import os
+import json
+import hashlib
+import subprocess
+import threading
+import traceback
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MANIFEST_VERSION = 1
+MANIFEST_PREFIX = 'manifest-'
+MANIFESTS_TO_KEEP = int(os.environ.get('SCAN_CACHE_KEEP', '5'))
+
+def get_cache_dir() -> Path:
+    """Get the directory for persisted caches, restorable with actions/cache"""
+    return Path(os.environ.get('CACHE_DIR', '~/.cache/gha-issue-resolution')).expanduser()
+
+def mark_cache_changed() -> None:
+    """Tell the action to save the cache directory after this run"""
+    output_path = os.environ.get('GITHUB_OUTPUT')
+    if not output_path:
+        return
+    try:
+        with open(output_path, 'a', encoding='utf-8') as f:
+            f.write('cache-changed=true\n')
+    except OSError as e:
+        print(f"Warning: Could not record cache change: {e}")
+
+def get_git_blob_ids(repo_root: Path) -> Dict[str, str]:
+    """Get the git blob id of every tracked file, or an empty dict without git"""
+    try:
+        output = subprocess.run(
+            ['git', 'ls-files', '-s', '-z'],
+            cwd=repo_root,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Warning: Could not list git blobs: {e}")
+        return {}
+
+    blob_ids = {}
+    for record in output.split('\0'):
+        if record:
+            meta, path = record.split('\t', 1)
+            blob_ids[path] = meta.split()[1]
+    return blob_ids
+
+class ScanCache:
+    """Manifest of relevant files with sizes, mtimes, content hashes and text
+
+    A manifest written for the current commit is trusted as is, so the
+    repository walk is skipped. Otherwise the newest manifest is used as a
+    base and only entries whose size and mtime (or git blob id) changed are
+    read again.
+    """
+
+    def __init__(self, cache_dir: Path, sha: str, repo_root: Path):
+        self.cache_dir = cache_dir
+        self.sha = sha
+        self.repo_root = repo_root
+        self.entries: Dict[str, dict] = {}
+        self.exact = False
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.cache_dir / f"{MANIFEST_PREFIX}{self.sha}.json"
+
+    def load(self) -> None:
+        """Load the manifest for this commit, or the newest one as a base"""
+        path = self.manifest_path
+        if not path.is_file():
+            manifests = sorted(
+                self.cache_dir.glob(f"{MANIFEST_PREFIX}*.json"),
+                key=lambda manifest: manifest.stat().st_mtime,
+                reverse=True
+            )
+            if not manifests:
+                print(f"No scan cache found in {self.cache_dir}")
+                return
+            path = manifests[0]
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable scan cache {path}: {e}")
+            return
+        if manifest.get('version') != MANIFEST_VERSION:
+            print(f"Ignoring scan cache {path} with old version")
+            return
+
+        self.entries = manifest.get('files', {})
+        self.exact = manifest.get('sha') == self.sha
+        print(f"Loaded scan cache for {manifest.get('sha')} with {len(self.entries)} entries "
+              f"({'exact match' if self.exact else 'base for refresh'})")
+
+    def paths(self) -> List[str]:
+        return sorted(self.entries)
+
+    def refresh(self, file_paths: List[str]) -> None:
+        """Replace the path list, keeping entries for unchanged files"""
+        blob_ids = get_git_blob_ids(self.repo_root)
+        refreshed = {}
+        stale = 0
+        with self.lock:
+            for file_path in file_paths:
+                try:
+                    stat = (self.repo_root / file_path).stat()
+                except OSError:
+                    continue
+                entry = {
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'blob': blob_ids.get(file_path),
+                }
+                old = self.entries.get(file_path)
+                if old and old['size'] == entry['size'] and (
+                    old['mtime_ns'] == entry['mtime_ns']
+                    or (entry['blob'] and old.get('blob') == entry['blob'])
+                ):
+                    entry['hash'] = old.get('hash')
+                    entry['text'] = old.get('text')
+                else:
+                    stale += 1
+                refreshed[file_path] = entry
+            self.entries = refreshed
+            self.exact = True
+            self.dirty = True
+        print(f"Scan cache refreshed: {len(refreshed) - stale} reused, {stale} to re-read")
+
+    def get_text(self, file_path: str) -> Optional[str]:
+        """Get cached text, only once the entries are known to match this commit"""
+        with self.lock:
+            if not self.exact:
+                return None
+            entry = self.entries.get(file_path)
+            return entry.get('text') if entry else None
+
+    def set_text(self, file_path: str, text: str) -> None:
+        with self.lock:
+            entry = self.entries.get(file_path) if self.exact else None
+            if entry is None:
+                return
+            entry['text'] = text
+            entry['hash'] = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            self.dirty = True
+
+    def save(self) -> None:
+        """Write the manifest for this commit and prune old ones"""
+        with self.lock:
+            # A base manifest from another commit must not be saved under this one
+            if not (self.dirty and self.exact):
+                return
+            manifest = {
+                'version': MANIFEST_VERSION,
+                'sha': self.sha,
+                'files': self.entries,
+            }
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                temp_path = self.manifest_path.with_suffix('.tmp')
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(manifest, f)
+                os.replace(temp_path, self.manifest_path)
+                self.dirty = False
+                mark_cache_changed()
+                print(f"Saved scan cache with {len(self.entries)} entries to {self.manifest_path}")
+            except OSError as e:
+                print(f"Warning: Failed to save scan cache: {e}")
+                print(traceback.format_exc())
+                return
+
+        manifests = sorted(
+            self.cache_dir.glob(f"{MANIFEST_PREFIX}*.json"),
+            key=lambda manifest: manifest.stat().st_mtime,
+            reverse=True
+        )
+        for old in manifests[MANIFESTS_TO_KEEP:]:
+            try:
+                old.unlink()
+            except OSError as e:
+                print(f"Warning: Failed to delete old scan cache {old}: {e}")
+
+_cache: Optional[ScanCache] = None
+_cache_loaded = False
+_cache_lock = threading.Lock()
+
+def get_scan_cache(repo_root: Path) -> Optional[ScanCache]:
+    """Get the scan cache for the current commit, or None outside GitHub Actions"""
+    global _cache, _cache_loaded
+    with _cache_lock:
+        if not _cache_loaded:
+            _cache_loaded = True
+            sha = os.environ.get('GITHUB_SHA')
+            if sha and os.environ.get('SCAN_CACHE', 'true').lower() != 'false':
+                _cache = ScanCache(get_cache_dir(), sha, repo_root)
+                _cache.load()
+        return _cache
+
+__all__ = ['ScanCache', 'get_scan_cache', 'get_cache_dir', 'mark_cache_changed']
@@ -0,0 +1,238 @@
+"""MinHash/LSH index of past issues and their analyses for near-duplicate detection"""
+import os
+import re
+import random
+import hashlib
+import sqlite3
+import traceback
+from array import array
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Set
+from gha_issue_resolution.scan_cache import get_cache_dir, mark_cache_changed
+
+NUM_PERM = 128
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+MERSENNE_PRIME = (1 << 61) - 1
+
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', '0.85'))
+# Shorter texts share too few shingles for a similarity estimate to mean anything
+MIN_SHINGLES = int(os.environ.get('DUPLICATE_MIN_SHINGLES', '12'))
+
+# Issue template scaffolding that many unrelated issues have in common
+TEMPLATE_PATTERNS = [
+    re.compile(pattern, re.MULTILINE | re.IGNORECASE)
+    for pattern in (
+        r'<!--[\s\S]*?-->',
+        r'^\s*#{1,6}\s.*$',
+        r'^\s*(\*\*|__)[^*_\n]+(\*\*|__):?\s*$',
+        r'^\s*[-*]\s*\[[ x]\].*$',
+        r'^.*\[e\.g\.[^\]]*\].*$',
+        r"^\s*\d+\.\s*(go to|click on|scroll down to)\s*'\.+'.*$",
+        r'^\s*\d+\.\s*see error\s*$',
+        r'^\s*a clear and concise description of .*$',
+        r'^\s*steps to reproduce the behaviou?r:?\s*$',
+        r'^\s*if applicable, add screenshots .*$',
+        r'^\s*add any other context .*$',
+        r'^\s*(describe the bug|to reproduce|expected behaviou?r|screenshots|'
+        r'additional context|desktop|smartphone)(\s*\([^)\n]*\))?\s*:?\s*$',
+    )
+]
+
+# Fixed seed so signatures stay comparable across runs
+_rng = random.Random(1)
+_PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    repo TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    sha TEXT NOT NULL,
+    url TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    UNIQUE (repo, number)
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    issue_id INTEGER NOT NULL REFERENCES issues (id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, bucket);
+CREATE INDEX IF NOT EXISTS bands_issue ON bands (issue_id);
+"""
+
+@dataclass
+class DuplicateMatch:
+    """A previously analysed issue that is a near-duplicate"""
+    number: int
+    url: str
+    analysis: str
+    similarity: float
+
+def strip_template(text: str) -> str:
+    """Remove issue template headings, placeholders and checklists"""
+    for pattern in TEMPLATE_PATTERNS:
+        text = pattern.sub('', text)
+    return text
+
+def get_shingles(text: str) -> Set[str]:
+    """Split normalised text, without template boilerplate, into overlapping word shingles"""
+    words = re.findall(r'\w+', strip_template(text).lower())
+    if len(words) < SHINGLE_SIZE:
+        return set(words)
+    return {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def get_signature(shingles: Set[str]) -> List[int]:
+    """Compute the MinHash signature of a non-empty set of shingles"""
+    if not shingles:
+        raise ValueError("Cannot compute a signature without shingles")
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+        for shingle in shingles
+    ]
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+def has_enough_shingles(shingles: Set[str]) -> bool:
+    return len(shingles) >= max(MIN_SHINGLES, 1)
+
+def get_band_buckets(signature: List[int]) -> List[int]:
+    """Hash each band of a signature into an LSH bucket"""
+    buckets = []
+    for band in range(BANDS):
+        rows = array('Q', signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+        digest = hashlib.blake2b(rows.tobytes(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'big', signed=True))
+    return buckets
+
+def estimate_similarity(first: List[int], second: List[int]) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / NUM_PERM
+
+class SimilarityIndex:
+    """Persistent index of issue texts and their analyses"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path)
+        connection.execute('PRAGMA foreign_keys = ON')
+        connection.executescript(SCHEMA)
+        return connection
+
+    def find_duplicate(self, repo: str, number: int, sha: str, text: str) -> Optional[DuplicateMatch]:
+        """Find the most similar other issue analysed on the same commit"""
+        shingles = get_shingles(text)
+        if not has_enough_shingles(shingles):
+            return None
+        signature = get_signature(shingles)
+        with closing(self._connect()) as connection:
+            candidate_ids = set()
+            for band, bucket in enumerate(get_band_buckets(signature)):
+                rows = connection.execute(
+                    'SELECT issue_id FROM bands WHERE band = ? AND bucket = ?',
+                    (band, bucket)
+                )
+                candidate_ids.update(row[0] for row in rows)
+            if not candidate_ids:
+                return None
+
+            placeholders = ','.join('?' * len(candidate_ids))
+            rows = connection.execute(
+                f'SELECT number, url, analysis, signature FROM issues '
+                f'WHERE id IN ({placeholders}) AND repo = ? AND sha = ? AND number != ?',
+                (*candidate_ids, repo, sha, number)
+            ).fetchall()
+
+        best = None
+        for other_number, url, analysis, blob in rows:
+            similarity = estimate_similarity(signature, array('Q', blob).tolist())
+            if similarity >= DUPLICATE_THRESHOLD and (best is None or similarity > best.similarity):
+                best = DuplicateMatch(other_number, url, analysis, similarity)
+        return best
+
+    def add(self, repo: str, number: int, sha: str, url: str, text: str, analysis: str) -> None:
+        """Store the latest analysis of an issue, replacing any earlier one
+
+        Only issues analysed on the same commit can match, so entries from
+        other commits are pruned. Issues too short to compare are not
+        indexed, but any earlier entry for the same issue is still removed.
+        """
+        shingles = get_shingles(text)
+        with closing(self._connect()) as connection:
+            with connection:
+                stale = connection.execute(
+                    'DELETE FROM issues WHERE repo = ? AND sha != ?', (repo, sha)
+                ).rowcount
+                connection.execute('DELETE FROM issues WHERE repo = ? AND number = ?', (repo, number))
+                if has_enough_shingles(shingles):
+                    signature = get_signature(shingles)
+                    cursor = connection.execute(
+                        'INSERT INTO issues (repo, number, sha, url, analysis, signature) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (repo, number, sha, url, analysis, array('Q', signature).tobytes())
+                    )
+                    connection.executemany(
+                        'INSERT INTO bands (band, bucket, issue_id) VALUES (?, ?, ?)',
+                        [(band, bucket, cursor.lastrowid)
+                         for band, bucket in enumerate(get_band_buckets(signature))]
+                    )
+            # Shrink the file so the saved cache does not carry freed pages
+            if stale:
+                print(f"Pruned {stale} issues analysed on other commits from the similarity index")
+                connection.execute('VACUUM')
+
+def get_similarity_index() -> Optional[SimilarityIndex]:
+    """Get the issue index, or None when disabled or outside GitHub Actions"""
+    if not os.environ.get('GITHUB_SHA'):
+        return None
+    if os.environ.get('SIMILARITY_INDEX', 'true').lower() == 'false':
+        return None
+    return SimilarityIndex(get_cache_dir() / 'issues.sqlite3')
+
+def find_duplicate_analysis(number: int, text: str) -> Optional[DuplicateMatch]:
+    """Look up a near-duplicate issue analysed on the current commit"""
+    index = get_similarity_index()
+    if index is None:
+        return None
+    try:
+        return index.find_duplicate(
+            os.environ.get('GITHUB_REPOSITORY', ''),
+            number,
+            os.environ['GITHUB_SHA'],
+            text
+        )
+    except sqlite3.Error as e:
+        print(f"Warning: Similarity index lookup failed: {e}")
+        print(traceback.format_exc())
+        return None
+
+def record_analysis(number: int, url: str, text: str, analysis: str) -> None:
+    """Store an issue and its analysis for later duplicate detection"""
+    index = get_similarity_index()
+    if index is None:
+        return
+    try:
+        index.add(
+            os.environ.get('GITHUB_REPOSITORY', ''),
+            number,
+            os.environ['GITHUB_SHA'],
+            url,
+            text,
+            analysis
+        )
+        mark_cache_changed()
+    except sqlite3.Error as e:
+        print(f"Warning: Failed to record analysis in similarity index: {e}")
+        print(traceback.format_exc())
+
+__all__ = ['DuplicateMatch', 'SimilarityIndex', 'find_duplicate_analysis', 'record_analysis']
@@ -0,0 +1,149 @@
+"""Run dependent tasks concurrently and report where wall time goes"""
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+@dataclass
+class Task:
+    """A named unit of work that runs once its dependencies have finished"""
+    name: str
+    func: Callable[..., Any]
+    deps: List[str] = field(default_factory=list)
+    lazy_deps: List[str] = field(default_factory=list)
+    result: Any = None
+    error: Optional[BaseException] = None
+    start: Optional[float] = None
+    end: Optional[float] = None
+    finished: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def duration(self) -> float:
+        if self.start is None or self.end is None:
+            return 0.0
+        return self.end - self.start
+
+    def wait(self) -> Any:
+        """Block until the task has finished and return its result"""
+        self.finished.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class TaskGraph:
+    """A small dependency graph of tasks executed on a thread pool
+
+    Each task function is called with the results of its dependencies as
+    positional arguments, in the order the dependencies were declared,
+    followed by a getter for each lazy dependency. A task starts without
+    waiting for its lazy dependencies; calling a getter blocks until that
+    dependency has finished, so work that is only sometimes needed can run
+    in the background without holding up the tasks that may not use it.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.tasks: Dict[str, Task] = {}
+        self.started_at: Optional[float] = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        deps: Sequence[str] = (),
+        lazy_deps: Sequence[str] = ()
+    ) -> None:
+        """Add a task depending on previously added tasks"""
+        if name in self.tasks:
+            raise ValueError(f"Duplicate task: {name}")
+        for dep in [*deps, *lazy_deps]:
+            if dep not in self.tasks:
+                raise ValueError(f"Task {name} depends on unknown task {dep}")
+        self.tasks[name] = Task(name, func, list(deps), list(lazy_deps))
+
+    def _run_task(self, task: Task) -> Any:
+        task.start = time.monotonic()
+        try:
+            task.result = task.func(
+                *(self.tasks[dep].result for dep in task.deps),
+                *(self.tasks[dep].wait for dep in task.lazy_deps)
+            )
+            return task.result
+        except BaseException as e:
+            task.error = e
+            raise
+        finally:
+            task.end = time.monotonic()
+            task.finished.set()
+
+    def run(self) -> Dict[str, Any]:
+        """Run all tasks, starting each as soon as its dependencies are done"""
+        self.started_at = time.monotonic()
+        pending = dict(self.tasks)
+        done = set()
+        running: Dict[Future, Task] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                for name, task in list(pending.items()):
+                    if all(dep in done for dep in task.deps):
+                        running[executor.submit(self._run_task, task)] = task
+                        del pending[name]
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception:
+                        print(f"Task {task.name} failed")
+                        for other in running:
+                            other.cancel()
+                        # Release running tasks waiting on a task that will never start
+                        for other in self.tasks.values():
+                            if other.start is None:
+                                other.error = RuntimeError(
+                                    f"Task {other.name} did not run because {task.name} failed"
+                                )
+                                other.finished.set()
+                        raise
+                    done.add(task.name)
+
+        return {name: task.result for name, task in self.tasks.items()}
+
+    def critical_path(self) -> List[Task]:
+        """Get the chain of tasks that determined the total wall time"""
+        finished = [task for task in self.tasks.values() if task.end is not None]
+        if not finished:
+            return []
+
+        path = [max(finished, key=lambda task: task.end)]
+        while path[-1].deps:
+            path.append(max(
+                (self.tasks[dep] for dep in path[-1].deps),
+                key=lambda task: task.end or 0.0
+            ))
+        return list(reversed(path))
+
+    def report(self) -> str:
+        """Format per-task timings and the critical path"""
+        if self.started_at is None:
+            return "Task graph has not run"
+
+        lines = ["Task timings (start offset, duration):"]
+        for task in sorted(self.tasks.values(), key=lambda task: task.start or float('inf')):
+            if task.start is None:
+                lines.append(f"  {task.name}: not started")
+                continue
+            offset = task.start - self.started_at
+            lines.append(f"  {task.name}: +{offset:.3f}s, {task.duration:.3f}s")
+
+        path = self.critical_path()
+        if path:
+            total = path[-1].end - self.started_at
+            chain = ' -> '.join(f"{task.name} ({task.duration:.3f}s)" for task in path)
+            lines.append(f"Critical path ({total:.3f}s): {chain}")
+        return '\n'.join(lines)
+
+__all__ = ['Task', 'TaskGraph']
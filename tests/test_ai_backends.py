@@ -0,0 +1,73 @@
+"""Tests for model routing and quota fallback"""
+import pytest
+from gha_issue_resolution import ai_backends
+from gha_issue_resolution.ai_backends import (
+    QuotaExceededError, StubBackend, MODEL_ID, SMALL_MODEL_ID, LARGE_MODEL_ID,
+    generate, get_fallback_chain, route_model,
+)
+
+class QuotaBackend(StubBackend):
+    """Stub backend whose listed models have no quota left"""
+
+    def __init__(self, exhausted):
+        self.exhausted = set(exhausted)
+        self.calls = []
+
+    def generate(self, model_id, content_parts, file_contents=None):
+        self.calls.append(model_id)
+        if model_id in self.exhausted:
+            raise QuotaExceededError(model_id)
+        return super().generate(model_id, content_parts, file_contents)
+
+@pytest.fixture
+def backend(monkeypatch):
+    def install(instance):
+        monkeypatch.setattr(ai_backends, '_backend', instance)
+        return instance
+    return install
+
+def test_short_prompt_goes_to_small_model_even_with_many_files():
+    assert route_model(prompt_tokens=400, total_tokens=500_000) == SMALL_MODEL_ID
+
+def test_long_prompt_goes_to_regular_model_even_in_small_repo():
+    assert route_model(prompt_tokens=5_000, total_tokens=6_000) == MODEL_ID
+
+def test_followup_goes_to_small_model():
+    assert route_model(prompt_tokens=5_000, total_tokens=6_000, followup=True) == SMALL_MODEL_ID
+
+def test_large_model_only_when_request_exceeds_regular_context():
+    assert route_model(prompt_tokens=5_000, total_tokens=900_000) == MODEL_ID
+    assert route_model(prompt_tokens=400, total_tokens=1_200_000) == LARGE_MODEL_ID
+
+def test_fallback_chain_skips_models_that_cannot_hold_request():
+    assert get_fallback_chain(SMALL_MODEL_ID, 1_000) == [SMALL_MODEL_ID, MODEL_ID, LARGE_MODEL_ID]
+    assert get_fallback_chain(LARGE_MODEL_ID, 1_200_000) == [LARGE_MODEL_ID]
+
+def test_stub_backend_is_deterministic(backend):
+    backend(StubBackend())
+    first = generate(["Issue text"], [("a.py", "x = 1")])
+    second = generate(["Issue text"], [("a.py", "x = 1")])
+    assert first == second
+    assert SMALL_MODEL_ID in first
+
+def test_quota_error_falls_back_to_next_model(backend):
+    stub = backend(QuotaBackend(exhausted=[SMALL_MODEL_ID]))
+    response = generate(["Short issue"])
+    assert stub.calls == [SMALL_MODEL_ID, MODEL_ID]
+    assert MODEL_ID in response
+
+def test_quota_error_raised_when_all_models_exhausted(backend):
+    stub = backend(QuotaBackend(exhausted=[SMALL_MODEL_ID, MODEL_ID, LARGE_MODEL_ID]))
+    with pytest.raises(QuotaExceededError):
+        generate(["Short issue"])
+    assert stub.calls == [SMALL_MODEL_ID, MODEL_ID, LARGE_MODEL_ID]
+
+def test_gemini_warm_up_makes_no_api_calls(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("warm-up must not call the API")
+
+    monkeypatch.setattr(ai_backends.genai, 'get_model', fail)
+    monkeypatch.setattr(ai_backends.genai, 'configure', lambda **kwargs: None)
+    gemini = ai_backends.GeminiBackend()
+    gemini.warm([MODEL_ID, SMALL_MODEL_ID])
+    assert set(gemini._models) == {MODEL_ID, SMALL_MODEL_ID}
@@ -0,0 +1,76 @@
+"""Tests for local changeset staging and the pull request paths that use it"""
+import pytest
+from gha_issue_resolution import pr_handler
+from gha_issue_resolution.changeset import ChangesetValidationError, stage_changes
+from gha_issue_resolution.pr_handler import create_pr_from_analysis
+
+class FakeIssue:
+    """Issue that records posted comments"""
+    number = 7
+
+    def __init__(self):
+        self.comments = []
+
+    def get_comments(self):
+        return list(self.comments)
+
+    def create_comment(self, body):
+        comment = type('Comment', (), {'body': body, 'html_url': 'https://example.com/comment'})()
+        self.comments.append(comment)
+        return comment
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    (tmp_path / 'app.py').write_text("x = 1\n")
+    monkeypatch.setenv('GITHUB_WORKSPACE', str(tmp_path))
+    monkeypatch.delenv('GITHUB_SHA', raising=False)
+    return tmp_path
+
+def fail_publish(repo):
+    raise AssertionError("nothing should be written to GitHub")
+
+@pytest.mark.parametrize('path', [
+    '.git/config',
+    '.GIT/config',
+    'vendor/lib/.git/hooks/pre-commit',
+    'vendor/.Git/HEAD',
+    '.github/workflows/ci.yml',
+    '.GitHub/Workflows/ci.yml',
+])
+def test_protected_paths_are_rejected_in_any_case(workspace, path):
+    with pytest.raises(ChangesetValidationError) as error:
+        stage_changes([(path, "x: 1\n")])
+    assert error.value.errors == [f"{path}: changes to this location are not allowed"]
+
+def test_gitignore_and_other_github_files_are_allowed(workspace):
+    staged = stage_changes([('.gitignore', "*.pyc\n"), ('.github/CODEOWNERS', "* @owner\n")])
+    assert sorted(staged.changes) == ['.github/CODEOWNERS', '.gitignore']
+
+def test_all_problems_are_reported_together(workspace):
+    with pytest.raises(ChangesetValidationError) as error:
+        stage_changes([
+            ('../outside.py', "x = 1\n"),
+            ('broken.py', "def f(:\n"),
+            ('data.json', "{"),
+            ('config.yml', "key: [unclosed\n"),
+        ])
+    assert len(error.value.errors) == 4
+
+def test_unchanged_files_are_dropped(workspace):
+    staged = stage_changes([('app.py', "x = 1\n"), ('new.py', "y = 2\n")])
+    assert list(staged.changes) == ['new.py']
+
+def test_validation_errors_are_posted_without_writing(workspace, monkeypatch):
+    monkeypatch.setattr(pr_handler, 'get_git_engine', fail_publish)
+    issue = FakeIssue()
+    assert create_pr_from_analysis(None, issue, "analysis", [('broken.py', "def f(:\n")]) is None
+    assert len(issue.comments) == 1
+    assert "failed validation" in issue.comments[0].body
+    assert "- broken.py: invalid Python syntax at line 1" in issue.comments[0].body
+
+def test_no_op_changeset_is_reported_without_writing(workspace, monkeypatch):
+    monkeypatch.setattr(pr_handler, 'get_git_engine', fail_publish)
+    issue = FakeIssue()
+    assert create_pr_from_analysis(None, issue, "analysis", [('app.py', "x = 1\n")]) is None
+    assert len(issue.comments) == 1
+    assert "already match the repository" in issue.comments[0].body
@@ -0,0 +1,87 @@
+"""Tests for reusing the analysis of near-duplicate issues"""
+import pytest
+from gha_issue_resolution import ai_backends
+from gha_issue_resolution.ai_backends import StubBackend
+from gha_issue_resolution.issue_processor import create_analysis_comment
+
+CRASH_REPORT = ("The parser crashes with a KeyError when the configuration file "
+                "contains an empty models section and the default model is not set")
+
+class CountingBackend(StubBackend):
+    """Stub backend that counts generation calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, model_id, content_parts, file_contents=None):
+        self.calls += 1
+        return super().generate(model_id, content_parts, file_contents)
+
+class FakeIssue:
+    """Issue that records posted comments"""
+
+    def __init__(self, number, title, body):
+        self.number = number
+        self.title = title
+        self.body = body
+        self.comments = []
+
+    def get_comments(self):
+        return list(self.comments)
+
+    def create_comment(self, body):
+        url = f'https://example.com/issues/{self.number}#comment-{len(self.comments)}'
+        comment = type('Comment', (), {'body': body, 'html_url': url})()
+        self.comments.append(comment)
+        return comment
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('GITHUB_SHA', 'abc123')
+    monkeypatch.setenv('GITHUB_REPOSITORY', 'owner/repo')
+    monkeypatch.delenv('GITHUB_OUTPUT', raising=False)
+    monkeypatch.delenv('SIMILARITY_INDEX', raising=False)
+    stub = CountingBackend()
+    monkeypatch.setattr(ai_backends, '_backend', stub)
+    return stub
+
+@pytest.fixture
+def file_reads():
+    reads = []
+
+    def get_file_contents():
+        reads.append(1)
+        return [('parser.py', "def parse(config):\n    return config['models']\n")]
+    get_file_contents.reads = reads
+    return get_file_contents
+
+def test_near_duplicate_reuses_earlier_analysis_without_generating(backend, file_reads):
+    first = FakeIssue(1, "Parser crash", CRASH_REPORT)
+    original = create_analysis_comment(first, get_file_contents=file_reads)
+    assert backend.calls == 1
+
+    second = FakeIssue(2, "Parser crash", CRASH_REPORT)
+    comment = create_analysis_comment(second, get_file_contents=file_reads)
+    assert backend.calls == 1
+    assert len(file_reads.reads) == 1
+    assert "near-duplicate of #1" in comment.body
+    assert original.html_url in comment.body
+    assert ai_backends.SMALL_MODEL_ID in comment.body
+
+def test_followup_generates_even_for_near_duplicate(backend, file_reads):
+    create_analysis_comment(FakeIssue(1, "Parser crash", CRASH_REPORT), get_file_contents=file_reads)
+
+    second = FakeIssue(2, "Parser crash", CRASH_REPORT)
+    comment = create_analysis_comment(second, followup=True, get_file_contents=file_reads)
+    assert backend.calls == 2
+    assert "near-duplicate" not in comment.body
+
+def test_unrelated_issue_generates_new_analysis(backend, file_reads):
+    create_analysis_comment(FakeIssue(1, "Parser crash", CRASH_REPORT), get_file_contents=file_reads)
+
+    other = ("The login button is missing from the header on mobile screens "
+             "after the navigation bar was redesigned in the last release")
+    comment = create_analysis_comment(FakeIssue(2, "Login button", other), get_file_contents=file_reads)
+    assert backend.calls == 2
+    assert "near-duplicate" not in comment.body
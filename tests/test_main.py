@@ -0,0 +1,81 @@
+"""Tests for how the entry point schedules startup work"""
+import json
+import threading
+import pytest
+from gha_issue_resolution import __main__ as entry, issue_processor
+
+class FakeIssue:
+    number = 3
+    title = "Crash on save"
+    body = "Saving a file crashes"
+
+class FakeRepo:
+    def get_issue(self, number):
+        return FakeIssue()
+
+class FakeGithub:
+    def get_repo(self, name):
+        return FakeRepo()
+
+class AnalysisComment:
+    body = "## AI-generated suggestion\n..."
+
+@pytest.fixture
+def run_event(tmp_path, monkeypatch):
+    monkeypatch.setenv('GITHUB_TOKEN', 'token')
+    monkeypatch.setenv('GITHUB_REPOSITORY', 'owner/repo')
+    monkeypatch.setattr(entry, 'create_github_client', lambda token: FakeGithub())
+    monkeypatch.setattr(entry, 'get_bot_comments', lambda issue: [AnalysisComment()])
+    monkeypatch.setattr(entry, 'warm_backend', lambda: None)
+
+    def run(event_name, payload):
+        event_path = tmp_path / 'event.json'
+        event_path.write_text(json.dumps(payload))
+        monkeypatch.setenv('GITHUB_EVENT_PATH', str(event_path))
+        monkeypatch.setenv('GITHUB_EVENT_NAME', event_name)
+        try:
+            entry.main()
+        except SystemExit:
+            pytest.fail("main() exited with an error")
+    return run
+
+def test_create_pr_run_does_not_read_repository(run_event, monkeypatch):
+    def fail(*args):
+        raise AssertionError("repository files should not be read")
+
+    monkeypatch.setattr(entry, 'get_relevant_files', fail)
+    monkeypatch.setattr(entry, 'read_files', fail)
+    pull_requests = []
+    monkeypatch.setattr(
+        issue_processor, 'create_pr_from_analysis',
+        lambda repo, issue, analysis: pull_requests.append(analysis)
+    )
+    run_event('issue_comment', {'issue': {'number': 3}, 'comment': {'body': '/create-pr', 'id': 1}})
+    assert len(pull_requests) == 1
+
+def test_processing_starts_before_file_reads_finish(run_event, monkeypatch):
+    processing_started = threading.Event()
+    released_by_processing = []
+
+    def slow_read_files(file_paths):
+        released_by_processing.append(processing_started.wait(timeout=5))
+        return [('app.py', "x = 1\n")]
+
+    def fake_process_issue(repo, issue, bot_comments=None, get_file_contents=None):
+        processing_started.set()
+        assert get_file_contents() == [('app.py', "x = 1\n")]
+
+    monkeypatch.setattr(entry, 'get_relevant_files', lambda: ['app.py'])
+    monkeypatch.setattr(entry, 'read_files', slow_read_files)
+    monkeypatch.setattr(entry, 'process_issue', fake_process_issue)
+    run_event('issues', {'issue': {'number': 3}})
+    assert released_by_processing == [True]
+
+@pytest.mark.parametrize('event_name, payload, expected', [
+    ('issues', {'issue': {'number': 3}}, True),
+    ('issue_comment', {'comment': {'body': 'Please /UPDATE this'}}, True),
+    ('issue_comment', {'comment': {'body': '/create-pr'}}, False),
+    ('issue_comment', {'comment': {'body': 'Thanks!'}}, False),
+])
+def test_needs_file_contents(event_name, payload, expected):
+    assert entry.needs_file_contents(event_name, payload) == expected
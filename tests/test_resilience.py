@@ -0,0 +1,220 @@
+"""Fault-injection tests for retries, deadlines, circuit breakers and idempotency guards"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import threading
+from types import SimpleNamespace
+import pytest
+from github.GithubException import GithubException
+from google.api_core import exceptions as google_exceptions
+from gha_issue_resolution import ai_backends, resilience
+from gha_issue_resolution.resilience import (
+    CallTimeoutError, CircuitBreaker, CircuitOpenError, call_with_retry, run_with_timeout,
+)
+
+class FakeClock:
+    """Monotonic clock that only advances when the code under test sleeps"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class FlakyCall:
+    """Callable that raises the queued errors before returning a result"""
+
+    def __init__(self, *errors, result='ok'):
+        self.errors = list(errors)
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.result
+
+def github_error(status, message=None, headers=None):
+    return GithubException(status, {'message': message} if message else None, headers or {})
+
+@pytest.fixture(autouse=True)
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(resilience.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(resilience.time, 'sleep', fake.sleep)
+    monkeypatch.setattr(resilience, '_breakers', {})
+    return fake
+
+def test_retries_transient_error_then_succeeds(clock):
+    call = FlakyCall(github_error(502), github_error(503))
+    assert call_with_retry("test", call) == 'ok'
+    assert call.calls == 3
+    assert len(clock.sleeps) == 2
+
+def test_non_transient_error_is_not_retried(clock):
+    call = FlakyCall(github_error(404))
+    with pytest.raises(GithubException):
+        call_with_retry("test", call)
+    assert call.calls == 1
+    assert clock.sleeps == []
+
+def test_numeric_retry_after_is_honoured(clock):
+    call = FlakyCall(github_error(429, headers={'Retry-After': '7'}))
+    call_with_retry("test", call)
+    assert clock.sleeps == [7.0]
+
+def test_http_date_retry_after_is_honoured(clock):
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=20)
+    call = FlakyCall(github_error(503, headers={'Retry-After': format_datetime(retry_at, usegmt=True)}))
+    call_with_retry("test", call)
+    assert 17 <= clock.sleeps[0] <= 20
+
+def test_secondary_rate_limit_is_retried(clock):
+    call = FlakyCall(github_error(403, "You have exceeded a secondary rate limit", {'retry-after': '60'}))
+    call_with_retry("test", call)
+    assert call.calls == 2
+    assert clock.sleeps == [60.0]
+
+def test_plain_forbidden_is_not_retried():
+    call = FlakyCall(github_error(403, "Resource not accessible by integration"))
+    with pytest.raises(GithubException):
+        call_with_retry("test", call)
+    assert call.calls == 1
+
+def test_gives_up_after_retry_cap(clock):
+    call = FlakyCall(*[github_error(502) for _ in range(10)])
+    with pytest.raises(GithubException):
+        call_with_retry("test", call, retries=2)
+    assert call.calls == 3
+    assert len(clock.sleeps) == 2
+
+def test_gives_up_when_retry_would_pass_deadline(clock):
+    call = FlakyCall(github_error(503, headers={'Retry-After': '100'}))
+    with pytest.raises(GithubException):
+        call_with_retry("test", call, deadline=50)
+    assert call.calls == 1
+    assert clock.sleeps == []
+
+def test_breaker_opens_short_circuits_and_recovers_after_cooldown(clock, monkeypatch):
+    breaker = CircuitBreaker('github', threshold=2, cooldown=30)
+    monkeypatch.setitem(resilience._breakers, 'github', breaker)
+
+    failing = FlakyCall(*[github_error(502) for _ in range(10)])
+    with pytest.raises(GithubException):
+        call_with_retry("test", failing, retries=1)
+    assert breaker.opened_at is not None
+
+    short_circuited = FlakyCall()
+    with pytest.raises(CircuitOpenError):
+        call_with_retry("test", short_circuited)
+    assert short_circuited.calls == 0
+
+    # After the cooldown a trial call goes through and closes the circuit
+    clock.now += 31
+    trial = FlakyCall()
+    assert call_with_retry("test", trial) == 'ok'
+    assert trial.calls == 1
+    assert breaker.opened_at is None and breaker.failures == 0
+
+def test_failed_trial_call_reopens_breaker(clock, monkeypatch):
+    breaker = CircuitBreaker('github', threshold=1, cooldown=30)
+    monkeypatch.setitem(resilience._breakers, 'github', breaker)
+    breaker.record_failure()
+
+    clock.now += 31
+    with pytest.raises(GithubException):
+        call_with_retry("test", FlakyCall(github_error(502)), retries=0)
+    with pytest.raises(CircuitOpenError):
+        call_with_retry("test", FlakyCall())
+
+def test_idempotency_guard_returns_existing_resource_instead_of_writing_twice():
+    created = []
+
+    def create_pull():
+        # The write reaches the server but the response is lost
+        created.append('pr')
+        raise github_error(504)
+
+    result = call_with_retry(
+        "Create pull request",
+        create_pull,
+        idempotency_check=lambda: 'existing-pr' if created else None
+    )
+    assert result == 'existing-pr'
+    assert created == ['pr']
+
+def test_idempotency_guard_is_not_consulted_on_first_attempt():
+    checks = []
+    call_with_retry("test", FlakyCall(), idempotency_check=lambda: checks.append(1))
+    assert checks == []
+
+def test_transient_error_in_idempotency_guard_is_retried(clock):
+    write = FlakyCall(github_error(502), result='written')
+    guard = FlakyCall(github_error(502), result=None)
+    assert call_with_retry("test", write, idempotency_check=guard) == 'written'
+    assert guard.calls == 2
+    assert write.calls == 2
+
+class HangingModel:
+    """Gemini model stub whose first requests hang until their timeout"""
+
+    def __init__(self, clock, hangs):
+        self.clock = clock
+        self.hangs = hangs
+        self.calls = []
+
+    def generate_content(self, content_parts, request_options):
+        self.calls.append(content_parts)
+        if len(self.calls) <= self.hangs:
+            self.clock.now += request_options['timeout']
+            raise google_exceptions.DeadlineExceeded("request timed out")
+        candidate = SimpleNamespace(finish_reason='STOP', safety_ratings=[])
+        return SimpleNamespace(prompt_feedback=None, candidates=[candidate], text='analysis')
+
+def gemini_backend(monkeypatch, model):
+    monkeypatch.setattr(ai_backends.genai, 'configure', lambda **kwargs: None)
+    backend = ai_backends.GeminiBackend()
+    backend._models[ai_backends.MODEL_ID] = model
+    return backend
+
+def test_hung_generation_is_retried_within_deadline(clock, monkeypatch):
+    model = HangingModel(clock, hangs=1)
+    backend = gemini_backend(monkeypatch, model)
+    assert backend.generate(ai_backends.MODEL_ID, ["Issue"]) == 'analysis'
+    assert len(model.calls) == 2
+    assert len(clock.sleeps) == 1
+
+def test_run_with_timeout_stops_waiting_for_hung_call():
+    release = threading.Event()
+    with pytest.raises(CallTimeoutError):
+        run_with_timeout("Hang", lambda: release.wait(5), 0.05)
+    release.set()
+    assert run_with_timeout("Quick", lambda: 'done', 5) == 'done'
+    with pytest.raises(ZeroDivisionError):
+        run_with_timeout("Broken", lambda: 1 / 0, 5)
+
+def test_hung_upload_is_abandoned_and_retried(clock, monkeypatch):
+    release = threading.Event()
+    uploads = []
+
+    def upload_file(path):
+        uploads.append(path)
+        if len(uploads) == 1:
+            release.wait(5)
+        return 'uploaded-file'
+
+    monkeypatch.setattr(ai_backends, 'GEMINI_UPLOAD_TIMEOUT', 0.05)
+    monkeypatch.setattr(ai_backends.genai, 'upload_file', upload_file)
+    model = HangingModel(clock, hangs=0)
+    backend = gemini_backend(monkeypatch, model)
+    try:
+        assert backend.generate(ai_backends.MODEL_ID, ["Issue"], [('app.py', "x = 1\n")]) == 'analysis'
+    finally:
+        release.set()
+    assert len(uploads) == 2
+    assert model.calls[0][-1] == 'uploaded-file'
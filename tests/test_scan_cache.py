@@ -0,0 +1,94 @@
+"""Tests for the per-commit scan cache"""
+import os
+import pathlib
+import pytest
+from gha_issue_resolution import file_utils, scan_cache
+from gha_issue_resolution.file_utils import get_file_content, get_relevant_files, read_files
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    repo = tmp_path / 'repo'
+    repo.mkdir()
+    (repo / 'app.py').write_text("x = 1\n")
+    (repo / 'util.py').write_text("y = 2\n")
+    output = tmp_path / 'github_output'
+    monkeypatch.setenv('GITHUB_WORKSPACE', str(repo))
+    monkeypatch.setenv('CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setenv('GITHUB_OUTPUT', str(output))
+    monkeypatch.delenv('SCAN_CACHE', raising=False)
+    return repo
+
+def start_run(monkeypatch, sha):
+    """Simulate a fresh process for a workflow run on the given commit"""
+    monkeypatch.setenv('GITHUB_SHA', sha)
+    monkeypatch.setattr(scan_cache, '_cache', None)
+    monkeypatch.setattr(scan_cache, '_cache_loaded', False)
+
+def fail_walk(monkeypatch, error):
+    def rglob(*args, **kwargs):
+        raise error
+    monkeypatch.setattr(pathlib.Path, 'rglob', rglob)
+
+def track_reads(monkeypatch):
+    """Record the names of files opened by file_utils"""
+    reads = []
+    def tracking_open(path, *args, **kwargs):
+        reads.append(pathlib.Path(path).name)
+        return open(path, *args, **kwargs)
+    monkeypatch.setattr(file_utils, 'open', tracking_open, raising=False)
+    return reads
+
+def cache_changed(workspace):
+    output = workspace.parent / 'github_output'
+    return output.is_file() and 'cache-changed=true' in output.read_text()
+
+def test_same_commit_skips_walk_and_reads(workspace, monkeypatch):
+    start_run(monkeypatch, 'aaa')
+    assert read_files(get_relevant_files()) == [('app.py', "x = 1\n"), ('util.py', "y = 2\n")]
+    assert cache_changed(workspace)
+
+    start_run(monkeypatch, 'aaa')
+    fail_walk(monkeypatch, AssertionError("repository walk should be skipped"))
+    reads = track_reads(monkeypatch)
+    (workspace.parent / 'github_output').unlink()
+    assert read_files(get_relevant_files()) == [('app.py', "x = 1\n"), ('util.py', "y = 2\n")]
+    assert reads == []
+    assert not cache_changed(workspace)
+
+def test_new_commit_rereads_only_changed_files(workspace, monkeypatch):
+    start_run(monkeypatch, 'aaa')
+    read_files(get_relevant_files())
+
+    (workspace / 'app.py').write_text("x = 100\n")
+    (workspace / 'new.py').write_text("z = 3\n")
+    start_run(monkeypatch, 'bbb')
+    assert not scan_cache.get_scan_cache(workspace).exact
+    reads = track_reads(monkeypatch)
+    assert read_files(get_relevant_files()) == [
+        ('app.py', "x = 100\n"), ('new.py', "z = 3\n"), ('util.py', "y = 2\n")
+    ]
+    assert sorted(reads) == ['app.py', 'new.py']
+    assert (workspace.parent / 'cache' / 'manifest-bbb.json').is_file()
+
+def test_same_size_change_is_detected_by_mtime(workspace, monkeypatch):
+    start_run(monkeypatch, 'aaa')
+    read_files(get_relevant_files())
+
+    app = workspace / 'app.py'
+    app.write_text("x = 9\n")
+    stat = app.stat()
+    os.utime(app, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    start_run(monkeypatch, 'bbb')
+    assert read_files(get_relevant_files())[0] == ('app.py', "x = 9\n")
+
+def test_base_manifest_text_is_not_served_when_walk_fails(workspace, monkeypatch):
+    start_run(monkeypatch, 'aaa')
+    read_files(get_relevant_files())
+
+    (workspace / 'app.py').write_text("x = 100\n")
+    start_run(monkeypatch, 'bbb')
+    fail_walk(monkeypatch, OSError("walk failed"))
+    assert get_relevant_files() == []
+    assert get_file_content('app.py') == "x = 100\n"
+    scan_cache.get_scan_cache(workspace).save()
+    assert not (workspace.parent / 'cache' / 'manifest-bbb.json').exists()
@@ -0,0 +1,94 @@
+"""Tests for near-duplicate issue detection"""
+import sqlite3
+from contextlib import closing
+import pytest
+from gha_issue_resolution.similarity_index import SimilarityIndex, get_shingles, strip_template
+
+BUG_TEMPLATE = """**Describe the bug**
+A clear and concise description of what the bug is.
+{description}
+
+**To Reproduce**
+Steps to reproduce the behavior:
+1. Go to '...'
+2. Click on '....'
+3. Scroll down to '....'
+4. See error
+
+**Expected behavior**
+A clear and concise description of what you expected to happen.
+
+**Screenshots**
+If applicable, add screenshots to help explain your problem.
+
+**Desktop (please complete the following information):**
+ - OS: [e.g. iOS]
+ - Browser [e.g. chrome, safari]
+ - Version [e.g. 22]
+
+**Additional context**
+Add any other context about the problem here.
+<!-- Please search existing issues
+before opening a new one -->
+"""
+
+CRASH_REPORT = ("The parser crashes with a KeyError when the configuration file "
+                "contains an empty models section and the default model is not set")
+
+@pytest.fixture
+def index(tmp_path):
+    return SimilarityIndex(tmp_path / 'issues.sqlite3')
+
+def add(index, number, text, sha='sha'):
+    index.add('owner/repo', number, sha, f'https://example.com/{number}', text, f'analysis {number}')
+
+def count_rows(index, table):
+    with closing(sqlite3.connect(index.path)) as connection:
+        return connection.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+def find(index, number, text):
+    return index.find_duplicate('owner/repo', number, 'sha', text)
+
+def test_template_boilerplate_is_stripped():
+    stripped = strip_template(BUG_TEMPLATE.format(description="Saving fails"))
+    assert stripped.split() == ["Saving", "fails"]
+
+def test_blank_template_issues_with_different_titles_do_not_match(index):
+    add(index, 1, "Crash on save\n" + BUG_TEMPLATE.format(description=""))
+    assert find(index, 2, "Login button missing\n" + BUG_TEMPLATE.format(description="")) is None
+
+def test_template_issues_with_different_descriptions_do_not_match(index):
+    add(index, 1, "Parser crash\n" + BUG_TEMPLATE.format(description=CRASH_REPORT))
+    other = ("The login button is missing from the header on mobile screens "
+             "after the navigation bar was redesigned in the last release")
+    assert find(index, 2, "Login button\n" + BUG_TEMPLATE.format(description=other)) is None
+
+def test_short_issues_do_not_match(index):
+    add(index, 1, "Bug\n")
+    assert find(index, 2, "Bug\n") is None
+    assert find(index, 3, "Bug\nIt does not work") is None
+
+def test_empty_issues_do_not_match(index):
+    add(index, 1, "\n")
+    assert get_shingles("\n") == set()
+    assert find(index, 2, "\n") is None
+
+def test_true_duplicate_matches_despite_different_template_wrapping(index):
+    add(index, 1, "Parser crash\n" + BUG_TEMPLATE.format(description=CRASH_REPORT))
+    match = find(index, 2, f"Parser crash\n{CRASH_REPORT}")
+    assert match is not None
+    assert match.number == 1
+    assert match.analysis == 'analysis 1'
+
+def test_reanalysed_short_issue_drops_its_old_entry(index):
+    add(index, 1, f"Parser crash\n{CRASH_REPORT}")
+    add(index, 1, "Bug\n")
+    assert find(index, 2, f"Parser crash\n{CRASH_REPORT}") is None
+
+def test_issues_from_other_commits_are_pruned(index):
+    add(index, 1, f"Parser crash\n{CRASH_REPORT}", sha='old')
+    add(index, 2, f"Another crash\n{CRASH_REPORT} while loading plugins", sha='old')
+    add(index, 3, f"Parser crash\n{CRASH_REPORT}", sha='new')
+    assert count_rows(index, 'issues') == 1
+    assert count_rows(index, 'bands') == 16
+    assert index.find_duplicate('owner/repo', 4, 'new', f"Parser crash\n{CRASH_REPORT}").number == 3
@@ -0,0 +1,130 @@
+"""Tests for the startup task scheduler"""
+import threading
+import time
+import pytest
+from gha_issue_resolution.task_graph import TaskGraph
+
+def test_diamond_runs_in_dependency_order_with_positional_results():
+    order = []
+    lock = threading.Lock()
+
+    def record(name, value):
+        def run(*args):
+            with lock:
+                order.append(name)
+            return value(*args)
+        return run
+
+    graph = TaskGraph()
+    graph.add('root', record('root', lambda: 2))
+    graph.add('left', record('left', lambda root: root + 1), deps=['root'])
+    graph.add('right', record('right', lambda root: root * 10), deps=['root'])
+    graph.add('join', record('join', lambda right, left: (right, left)), deps=['right', 'left'])
+
+    results = graph.run()
+    assert results == {'root': 2, 'left': 3, 'right': 20, 'join': (20, 3)}
+    assert order[0] == 'root' and order[-1] == 'join'
+    assert set(order[1:3]) == {'left', 'right'}
+
+def test_independent_tasks_run_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = TaskGraph(max_workers=2)
+    graph.add('first', barrier.wait)
+    graph.add('second', barrier.wait)
+    graph.run()
+
+def test_unknown_and_duplicate_tasks_are_rejected():
+    graph = TaskGraph()
+    graph.add('a', lambda: None)
+    with pytest.raises(ValueError):
+        graph.add('a', lambda: None)
+    with pytest.raises(ValueError):
+        graph.add('b', lambda: None, deps=['missing'])
+    with pytest.raises(ValueError):
+        graph.add('c', lambda: None, lazy_deps=['missing'])
+
+def test_failure_propagates_and_dependents_do_not_run():
+    ran = []
+    graph = TaskGraph()
+    graph.add('broken', lambda: 1 / 0)
+    graph.add('after', lambda value: ran.append(value), deps=['broken'])
+    with pytest.raises(ZeroDivisionError):
+        graph.run()
+    assert ran == []
+    assert graph.tasks['after'].start is None
+
+def test_lazy_dependency_does_not_delay_start():
+    slow_done = threading.Event()
+    observed = []
+
+    def slow():
+        time.sleep(0.2)
+        slow_done.set()
+        return 'files'
+
+    def consumer(get_slow):
+        observed.append(slow_done.is_set())
+        observed.append(get_slow())
+
+    graph = TaskGraph()
+    graph.add('slow', slow)
+    graph.add('consumer', consumer, lazy_deps=['slow'])
+    graph.run()
+    assert observed == [False, 'files']
+
+def test_lazy_dependency_error_is_raised_by_getter():
+    graph = TaskGraph()
+    graph.add('broken', lambda: 1 / 0)
+    graph.add('consumer', lambda get_broken: get_broken(), lazy_deps=['broken'])
+    with pytest.raises(ZeroDivisionError):
+        graph.run()
+
+def test_getter_is_released_when_its_task_never_starts():
+    started = threading.Event()
+
+    def fail_once_consumer_waits():
+        started.wait(timeout=5)
+        raise RuntimeError("boom")
+
+    def consumer(get_blocked):
+        started.set()
+        get_blocked()
+
+    graph = TaskGraph()
+    graph.add('failing', fail_once_consumer_waits)
+    graph.add('blocked', lambda failing: failing, deps=['failing'])
+    graph.add('consumer', consumer, lazy_deps=['blocked'])
+    with pytest.raises(RuntimeError, match="boom"):
+        graph.run()
+    assert isinstance(graph.tasks['consumer'].error, RuntimeError)
+    assert "did not run" in str(graph.tasks['consumer'].error)
+
+def test_critical_path_follows_the_slowest_dependency():
+    graph = TaskGraph()
+    graph.add('fast', lambda: time.sleep(0.01))
+    graph.add('slow', lambda: time.sleep(0.15))
+    graph.add('after_slow', lambda _: time.sleep(0.01), deps=['slow'])
+    graph.add('join', lambda fast, after_slow: None, deps=['fast', 'after_slow'])
+    graph.run()
+    assert [task.name for task in graph.critical_path()] == ['slow', 'after_slow', 'join']
+
+def test_report_lists_timings_and_critical_path():
+    graph = TaskGraph()
+    assert graph.report() == "Task graph has not run"
+
+    graph.add('a', lambda: None)
+    graph.add('b', lambda a: None, deps=['a'])
+    graph.run()
+    lines = graph.report().splitlines()
+    assert lines[0] == "Task timings (start offset, duration):"
+    assert lines[1].startswith("  a: +") and lines[2].startswith("  b: +")
+    assert lines[3].startswith("Critical path (") and lines[3].endswith("s)")
+    assert "a (" in lines[3] and " -> b (" in lines[3]
+
+def test_report_marks_tasks_that_did_not_start():
+    graph = TaskGraph()
+    graph.add('broken', lambda: 1 / 0)
+    graph.add('after', lambda _: None, deps=['broken'])
+    with pytest.raises(ZeroDivisionError):
+        graph.run()
+    assert "  after: not started" in graph.report()